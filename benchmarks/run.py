@@ -0,0 +1,232 @@
+"""
+Benchmarks for KnowledgeBase and ArticleAPI on synthetic vaults
+
+External services are replaced by StubServices, so results only depend on
+local work and the configured latency.
+
+    python -m benchmarks.run                       # compare with baseline
+    python -m benchmarks.run --sizes 1000 10000 100000 --latency 0.05
+    python -m benchmarks.run --save                # update baseline
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import logging
+import warnings
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+
+import numpy as np
+
+from src.utils.config import Config
+from src.utils.title_index import TitleIndex
+from src.llm_api.open import OpenAPI
+from src.knowledge.base import KnowledgeBase
+from src.knowledge.article import Article
+from src.article_api.article_api import ArticleAPI, KNOWN_TITLE_THRESHOLD
+
+from benchmarks.vault import SyntheticCorpus, generate_vault
+from benchmarks.stubs import StubServices
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Differences below this are treated as noise when comparing with baseline
+NOISE_FLOOR_MS = 1.0
+CALIBRATION_RUNS = 5
+
+def setup_parser():
+    parser = argparse.ArgumentParser(
+        prog='benchmarks.run',
+        description='Benchmark KnowledgeBase and ArticleAPI on synthetic vaults.'
+        )
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200], help='Number of notes in each vault, e.g. 1000 10000 100000')
+    parser.add_argument('--references', type=int, default=20, help='References per article')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to each article service call')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='Seconds added to each LLM call')
+    parser.add_argument('--dim', type=int, default=64, help='Embedding dimension')
+    parser.add_argument('--queries', type=int, default=50, help='Queries for search and context benchmarks')
+    parser.add_argument('--articles', type=int, default=20, help='Articles for the get_data benchmark')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed slowdown ratio over baseline')
+    return parser
+
+##
+# Measurement
+def _ms(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+def _median_ms(func, args):
+    return statistics.median(_ms(lambda: func(arg))[0] for arg in args)
+
+def calibrate():
+    """
+    Time a fixed mix of Python and numpy work, so baselines recorded on
+    another machine can be scaled by relative machine speed
+
+    Returns:
+        float: Median milliseconds of the workload
+    """
+    rng = random.Random(0)
+    values = [rng.random() for _ in range(200000)]
+    matrix = np.random.default_rng(0).random((300, 300))
+
+    def workload():
+        sorted(values)
+        {str(v): v for v in values[:50000]}
+        matrix @ matrix
+    return _median_ms(lambda _: workload(), range(CALIBRATION_RUNS))
+
+def _reset_article_api():
+    ArticleAPI._reference_cache.clear()
+    ArticleAPI._known_titles = TitleIndex(threshold=KNOWN_TITLE_THRESHOLD)
+    ArticleAPI._known_years = {}
+
+def run_size(size, args):
+    """
+    Run all benchmarks on a vault of the given size
+
+    Returns:
+        dict: Timings in milliseconds, per-call medians for repeated operations
+    """
+    corpus = SyntheticCorpus(size, references=args.references)
+    stubs = StubServices(corpus, latency=args.latency, llm_latency=args.llm_latency, dim=args.dim)
+    rng = random.Random(size)
+    queries = [corpus.title(i) for i in rng.sample(range(size), min(args.queries, size))]
+    articles = rng.sample(range(size * 2), min(args.articles, size * 2))
+
+    results = {}
+    config = Config._config
+    with tempfile.TemporaryDirectory() as directory, stubs.patch(), contextlib.redirect_stdout(io.StringIO()):
+        Config._config = {"knowledgebase": directory, "type": "article", "llm_models": {}}
+        try:
+            _reset_article_api()
+            generate_vault(directory, corpus)
+
+            results["ingest_ms"], _ = _ms(lambda: KnowledgeBase(Article))
+            results["startup_ms"], kb = _ms(lambda: KnowledgeBase(Article))
+            results["process_files_ms"], _ = _ms(kb._process_files)
+
+            vectors = OpenAPI.embedding(queries)
+            results["vector_search_ms"] = _median_ms(lambda v: kb.vector_search("embedding_body", v), vectors)
+            results["qna_retrieval_ms"] = _median_ms(kb._get_relevant, queries)
+            related = [kb._get_relevant(query) for query in queries]
+            results["qna_context_ms"] = _median_ms(kb._build_context, related)
+
+            _reset_article_api()
+            results["get_data_ms"] = _median_ms(
+                lambda i: ArticleAPI.get_data(corpus.title(i), corpus.author(i), {"doi": corpus.doi(i)}),
+                articles
+            )
+        finally:
+            Config._config = config
+
+    results["service_calls"] = dict(sorted(stubs.calls.items()))
+    return results
+
+##
+# Baseline
+def compare(results, baseline, tolerance, scale=1.0):
+    """
+    Find timings slower than baseline by more than the tolerance
+
+    Args:
+        scale (float): Speed of the baseline machine relative to this one
+
+    Returns:
+        list[tuple]: (size, metric, baseline ms, current ms)
+    """
+    regressions = []
+    for size, metrics in results.items():
+        for metric, value in metrics.items():
+            if not metric.endswith("_ms"):
+                continue
+            previous = baseline.get(size, {}).get(metric)
+            if previous is None:
+                continue
+            previous *= scale
+            if value > previous * (1 + tolerance) and value - previous > NOISE_FLOOR_MS:
+                regressions.append((size, metric, previous, value))
+    return regressions
+
+def print_table(results, baseline, scale=1.0):
+    print(f"{'size':>8} {'metric':<20} {'ms':>12} {'baseline':>12} {'ratio':>7}")
+    for size, metrics in results.items():
+        for metric, value in metrics.items():
+            if not metric.endswith("_ms"):
+                continue
+            previous = baseline.get(size, {}).get(metric)
+            previous = previous * scale if previous is not None else None
+            ratio = f"{value / previous:.2f}" if previous else "-"
+            previous = f"{previous:.2f}" if previous is not None else "-"
+            print(f"{size:>8} {metric:<20} {value:>12.2f} {previous:>12} {ratio:>7}")
+
+def main():
+    args = setup_parser().parse_args()
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+
+    settings = {
+        "references": args.references,
+        "latency": args.latency,
+        "llm_latency": args.llm_latency,
+        "dim": args.dim,
+        "queries": args.queries,
+        "articles": args.articles,
+    }
+
+    calibration = calibrate()
+    baseline = {}
+    scale = 1.0
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get("settings") == settings:
+            baseline = stored["results"]
+            # Baseline timings are scaled to the speed of this machine
+            reference = stored.get("environment", {}).get("calibration_ms")
+            if reference:
+                scale = calibration / reference
+                print(f"Machine speed relative to baseline: {1 / scale:.2f}x", file=sys.stderr)
+        else:
+            print(f"Baseline settings differ from current run, not comparing: {stored.get('settings')}", file=sys.stderr)
+
+    results = {}
+    for size in args.sizes:
+        print(f"Benchmarking vault with {size} notes", file=sys.stderr)
+        results[str(size)] = run_size(size, args)
+
+    print_table(results, baseline, scale)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "settings": settings,
+                "environment": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "processor": platform.processor() or platform.machine(),
+                    "cpus": os.cpu_count(),
+                    "calibration_ms": calibration,
+                },
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        return
+
+    regressions = compare(results, baseline, args.tolerance, scale)
+    for size, metric, previous, value in regressions:
+        print(f"Regression: {metric} on {size} notes took {value:.2f} ms, baseline {previous:.2f} ms", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import re
+import time
+import hashlib
+import threading
+import contextlib
+from unittest import mock
+
+import numpy as np
+
+from src.llm_api.open import OpenAPI
+from src.article_api.ads_api import AdsQuery
+from src.article_api.arxiv_api import ArxivQuery
+from src.article_api.crossref_api import CrossrefQuery
+
+INDEX_PATTERNS = [
+    re.compile(r"synthetic\.(\d+)", re.IGNORECASE),
+    re.compile(r"study (\d+)", re.IGNORECASE),
+    re.compile(r"SynJ\.\.\.(\d{8})S"),
+]
+ARXIV_PATTERN = re.compile(r"(\d{2})01\.(\d{5})")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+class StubServices:
+    """
+    Offline stand-ins for OpenAPI, AdsQuery, CrossrefQuery and ArxivQuery
+
+    Responses are derived from a SyntheticCorpus and every call sleeps for the
+    configured latency, so benchmarks measure local work plus a controlled
+    amount of waiting instead of network and model variance.
+    """
+    def __init__(self, corpus, latency=0.0, llm_latency=0.0, dim=64):
+        self.corpus = corpus
+        self.latency = latency
+        self.llm_latency = llm_latency
+        self.dim = dim
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def patch(self):
+        stubs = {
+            OpenAPI: {
+                "embedding": self.embedding,
+                "qna": self.qna,
+                "query_keyword_generation": self.keywords,
+                "document_keyword_extraction": self.keywords,
+                "reference_parse": self.reference_parse,
+                "summarize": self.summarize,
+                "analyze_error": self.analyze_error,
+            },
+            ArxivQuery: {
+                "with_title": self.arxiv_with_title,
+                "with_arxiv": self.arxiv_with_arxiv,
+                "with_arxiv_ids": self.arxiv_with_arxiv_ids,
+            },
+            CrossrefQuery: {
+                "with_title": self.crossref_with_title,
+                "with_doi": self.crossref_with_doi,
+                "with_dois": self.crossref_with_dois,
+            },
+            AdsQuery: {
+                "with_title": self.ads_with_title,
+                "with_doi": self.ads_with_doi,
+                "with_bibcode": self.ads_with_bibcode,
+                "with_arxiv": self.ads_with_arxiv,
+            },
+        }
+        with contextlib.ExitStack() as stack:
+            for cls, methods in stubs.items():
+                for name, method in methods.items():
+                    stack.enter_context(mock.patch.object(cls, name, staticmethod(method)))
+            yield self
+
+    def _call(self, name, latency):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if latency:
+            time.sleep(latency)
+
+    @staticmethod
+    def _index(value):
+        if not value:
+            return None
+        for pattern in INDEX_PATTERNS:
+            match = pattern.search(str(value))
+            if match:
+                return int(match.group(1))
+        match = ARXIV_PATTERN.search(str(value))
+        if match:
+            return (int(match.group(1)) - 10) * 100000 + int(match.group(2))
+        return None
+
+    ##
+    # OpenAPI
+    def embedding(self, text):
+        self._call("embedding", self.llm_latency)
+        result = []
+        for t in text:
+            vector = np.zeros(self.dim)
+            for token in TOKEN_PATTERN.findall((t or "").lower()):
+                digest = hashlib.md5(token.encode()).digest()
+                vector[int.from_bytes(digest[:4], "little") % self.dim] += 1
+            norm = np.linalg.norm(vector)
+            result.append(vector / norm if norm else vector)
+        return result
+
+    def qna(self, query, example=None):
+        self._call("qna", self.llm_latency)
+        return {"answer": f"Stub answer to: {query}", "references": []}
+
+    def keywords(self, text, *args, **kwargs):
+        self._call("keywords", self.llm_latency)
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        return sorted(set(tokens), key=tokens.count, reverse=True)[:10]
+
+    def reference_parse(self, reference_list):
+        self._call("reference_parse", self.llm_latency)
+        result = []
+        for i, reference in enumerate(reference_list):
+            j = self._index(reference)
+            if j is None:
+                continue
+            result.append({
+                "index": i + 1,
+                "title": self.corpus.title(j),
+                "author": self.corpus.first_author(j),
+                "year": self.corpus.year(j),
+            })
+        return result
+
+    def summarize(self, text):
+        self._call("summarize", self.llm_latency)
+        return " ".join(text.split()[:50])
+
+    def analyze_error(self, error):
+        self._call("analyze_error", self.llm_latency)
+        lines = (error or "").splitlines()
+        return {"error_message": lines[:1], "location": lines[1:2], "traceback": lines[2:]}
+
+    ##
+    # arXiv
+    def _arxiv(self, i):
+        if i is None:
+            return None
+        return {
+            "title": self.corpus.title(i),
+            "first_author": self.corpus.first_author(i),
+            "year": self.corpus.year(i),
+            "arxiv_id": self.corpus.arxiv_id(i),
+            "doi": f"10.48550/arXiv.{self.corpus.arxiv_id(i)}",
+            "summary": self.corpus.abstract(i),
+        }
+
+    def arxiv_with_title(self, title, author):
+        self._call("arxiv", self.latency)
+        return self._arxiv(self._index(title))
+
+    def arxiv_with_arxiv(self, arxiv_id):
+        self._call("arxiv", self.latency)
+        return self._arxiv(self._index(arxiv_id))
+
+    def arxiv_with_arxiv_ids(self, arxiv_ids):
+        self._call("arxiv", self.latency)
+        result = {}
+        for arxiv_id in arxiv_ids:
+            data = self._arxiv(self._index(arxiv_id))
+            if data:
+                result[arxiv_id] = data
+        return result
+
+    ##
+    # Crossref
+    def _crossref(self, i, get_references):
+        if i is None:
+            return None
+        result = {
+            "title": self.corpus.title(i),
+            "first_author": self.corpus.first_author(i),
+            "year": self.corpus.year(i),
+            "doi": self.corpus.doi(i),
+            "abstract": self.corpus.abstract(i),
+        }
+        if get_references:
+            reference = []
+            for n, j in enumerate(self.corpus.reference_ids(i)):
+                if n % 5 == 0:
+                    reference.append({"unstructured": self.corpus.unstructured(j)})
+                elif n % 5 != 4:
+                    reference.append({"DOI": self.corpus.doi(j)})
+            result["reference"] = reference
+        return result
+
+    def crossref_with_title(self, title, author, get_references=True):
+        self._call("crossref", self.latency)
+        return self._crossref(self._index(title), get_references)
+
+    def crossref_with_doi(self, doi, get_references=True):
+        self._call("crossref", self.latency)
+        return self._crossref(self._index(doi), get_references)
+
+    def crossref_with_dois(self, dois, get_references=False):
+        self._call("crossref", self.latency)
+        result = {}
+        for doi in dois:
+            data = self._crossref(self._index(doi), get_references)
+            if data:
+                result[doi] = data
+        return result
+
+    ##
+    # ADS
+    def _ads(self, i, get_references):
+        if i is None:
+            return None
+        result = {
+            "title": self.corpus.title(i),
+            "first_author": self.corpus.first_author(i),
+            "year": self.corpus.year(i),
+            "bibcode": self.corpus.bibcode(i),
+            "doi": self.corpus.doi(i),
+            "abstract": self.corpus.abstract(i),
+        }
+        if get_references:
+            result["reference"] = [
+                self._ads(j, False)
+                for n, j in enumerate(self.corpus.reference_ids(i)) if n % 5 == 4
+            ]
+        return result
+
+    def ads_with_title(self, title, author, get_references=True):
+        self._call("ads", self.latency)
+        return self._ads(self._index(title), get_references)
+
+    def ads_with_doi(self, doi, get_references=True):
+        self._call("ads", self.latency)
+        return self._ads(self._index(doi), get_references)
+
+    def ads_with_bibcode(self, bibcode, get_references=True):
+        self._call("ads", self.latency)
+        return self._ads(self._index(bibcode), get_references)
+
+    def ads_with_arxiv(self, arxiv_id, get_references=True):
+        self._call("ads", self.latency)
+        return self._ads(self._index(arxiv_id), get_references)
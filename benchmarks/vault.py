@@ -0,0 +1,115 @@
+import os
+import random
+
+TOPICS = [
+    "turbulent flow", "galaxy formation", "dark matter halos", "superhydrophobic surfaces",
+    "neural networks", "stellar winds", "boundary layers", "plasma instabilities",
+    "exoplanet atmospheres", "gravitational waves", "drag reduction", "cosmic rays",
+]
+WORDS = [
+    "model", "simulation", "observation", "theory", "spectrum", "velocity", "density",
+    "energy", "scale", "structure", "turbulence", "galaxy", "surface", "friction",
+    "network", "signal", "field", "pressure", "temperature", "radiation", "dynamics",
+    "analysis", "measurement", "estimate", "correlation", "distribution", "evolution",
+]
+LAST_NAMES = [
+    "Fukagata", "Kasagi", "Smith", "Tanaka", "Garcia", "Muller", "Rossi", "Kim",
+    "Ivanov", "Dubois", "Nakamura", "Silva", "Cohen", "Larsen", "Novak", "Okafor",
+]
+
+class SyntheticCorpus:
+    """
+    Deterministic synthetic articles, identified by integer index
+
+    Article i has a unique title, DOI, arXiv ID and bibcode that encode i,
+    so stubbed services can resolve any identifier back to the article.
+    """
+    def __init__(self, size, references=20, seed=0):
+        self.size = size
+        self.references = references
+        self.seed = seed
+
+    def title(self, i):
+        return f"Synthetic study {i} of {TOPICS[i % len(TOPICS)]}"
+
+    def author(self, i):
+        first = LAST_NAMES[i % len(LAST_NAMES)]
+        second = LAST_NAMES[(i * 7 + 3) % len(LAST_NAMES)]
+        return f"{first}, Koji and {second}, Nobuhide"
+
+    def first_author(self, i):
+        return f"{LAST_NAMES[i % len(LAST_NAMES)]}, Koji"
+
+    def year(self, i):
+        return 1990 + i % 35
+
+    def doi(self, i):
+        return f"10.5555/synthetic.{i}"
+
+    def arxiv_id(self, i):
+        return f"{10 + i // 100000:02d}01.{i % 100000:05d}"
+
+    def bibcode(self, i):
+        return f"{self.year(i)}SynJ...{i:08d}S"
+
+    def abstract(self, i):
+        rng = random.Random(self.seed * 1000003 + i)
+        return f"We study {TOPICS[i % len(TOPICS)]}. " + " ".join(rng.choices(WORDS, k=60)) + "."
+
+    def unstructured(self, i):
+        return f"{self.first_author(i)} et al., {self.title(i)}, Synthetic Journal, {self.year(i)}"
+
+    def reference_ids(self, i):
+        """
+        Indices of articles cited by article i, half of them outside the vault
+        """
+        rng = random.Random(self.seed * 1000003 + i)
+        return [rng.randrange(self.size * 2) for _ in range(self.references)]
+
+    def note(self, i):
+        rng = random.Random(self.seed * 1000003 + i)
+        paragraphs = [" ".join(rng.choices(WORDS, k=80)) + "." for _ in range(3)]
+        references = "\n".join(f"- [[{self.title(j)}]]" for j in self.reference_ids(i)[:5])
+        return (
+            "---\n"
+            f"created: \"2025-01-{1 + i % 28:02d} 12:00:00\"\n"
+            f"source: \"synthetic-{i}\"\n"
+            "---\n\n"
+            f"# {self.title(i)}\n"
+            + "\n\n".join(paragraphs) + "\n\n"
+            f"See also doi:{self.doi((i + 1) % self.size)}.\n\n"
+            "## Others\n"
+            "### BibTeX\n"
+            "```BibTeX\n"
+            f"@article{{synthetic{i},\n"
+            f"  title={{{self.title(i)}}},\n"
+            f"  author={{{self.author(i)}}},\n"
+            f"  journal={{Synthetic Journal}},\n"
+            f"  year={{{self.year(i)}}},\n"
+            f"  doi={{{self.doi(i)}}},\n"
+            f"  eprint={{{self.arxiv_id(i)}}}\n"
+            "}\n"
+            "```\n\n"
+            "### References\n"
+            f"{references}\n"
+        )
+
+def generate_vault(directory, corpus):
+    """
+    Write a note for every article of the corpus
+
+    Args:
+        directory (str): Vault directory
+        corpus (SyntheticCorpus): Articles to write
+
+    Returns:
+        list[str]: File names of the notes
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(corpus.size):
+        file_name = f"synthetic-{i:06d}.md"
+        with open(os.path.join(directory, file_name), "w", encoding="utf-8") as f:
+            f.write(corpus.note(i))
+        files.append(file_name)
+    return files
@@ -1,20 +1,79 @@
 #!/usr/bin/env python3
 
+import threading
+
 from src.cli.parser import parse_args
+from src.utils.profile import Profiler
+
+def load_kb():
+    # Imported on use, so --help and argument errors skip pandas and API clients
+    with Profiler.phase("import.knowledge"):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.factory import KnowledgeFactory
+        from src.knowledge.federated import FederatedKnowledgeBase
+
+    shards = Config.knowledgebases()
+    if len(shards) > 1:
+        return FederatedKnowledgeBase(shards)
+
+    return KnowledgeBase(
+        KnowledgeFactory.create(
+            shards[0]["type"]
+        ),
+        note_directory=shards[0]["path"],
+        name=shards[0]["name"]
+    )
+
+def watch(kb, background=False):
+    from src.knowledge.watcher import KnowledgeWatcher
 
-from src.utils.config import Config
+    shards = list(kb.shards.values()) if hasattr(kb, "shards") else [kb]
+    if len(shards) == 1 and not background:
+        KnowledgeWatcher(kb).run()
+        return
 
-from src.knowledge.base import KnowledgeBase
-from src.knowledge.factory import KnowledgeFactory
+    threads = [threading.Thread(target=KnowledgeWatcher(shard).run, daemon=True) for shard in shards]
+    for thread in threads:
+        thread.start()
+    if background:
+        return
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print("SB: Stopped watching")
 
 def main():
     args = parse_args()
 
-    kb = KnowledgeBase(
-        KnowledgeFactory.create(
-            Config.type()
-        )
-    )
+    if args.import_time:
+        print(Profiler.import_report())
+        return
+
+    if args.batch:
+        from src.cli.batch import run_batch
+        run_batch(load_kb, args.batch, args.output, args.workers)
+        return
+
+    kb = load_kb()
+    try:
+        run(kb, args)
+    finally:
+        # Cached answers are saved in batches, save the rest
+        kb.close()
+
+def run(kb, args):
+    if args.serve:
+        from src.cli.server import serve
+        if args.watch:
+            watch(kb, background=True)
+        serve(kb, args.host, args.port)
+        return
+
+    if args.watch:
+        watch(kb)
+        return
 
     while True:
         query = input("Q: ")
@@ -1,46 +1,80 @@
-import os
 import logging
-import requests
 
+from src.utils.config import Config
+from src.utils.log import LogUtils
 from src.utils.text import TextUtils
 from src.utils.warn import WarningProcessor
 
+from src.article_api.circuit_breaker import CircuitBreaker
+
 logger = logging.getLogger(__name__)
 
-TOKEN = os.environ["ADS_API_KEY"]
 API_ENDPOINT = "https://api.adsabs.harvard.edu/v1/search/query"
+REQUEST_TIMEOUT = 30
 
 class AdsQuery:
-    headers = {
-        "Authorization": "Bearer " + TOKEN,
-    }
+    breaker = CircuitBreaker("ADS")
+
+    @staticmethod
+    def headers():
+        return {
+            "Authorization": "Bearer " + Config.api_key("ADS_API_KEY"),
+        }
 
     @classmethod
     def _query(cls, query, get_references=False):
+        import requests
+
         logger.debug(f"> Query: {query}")
+        try:
+            headers = cls.headers()
+        except KeyError as e:
+            # Without a key ADS is skipped, other sources are still queried
+            cls.breaker.disable(e)
+        if not cls.breaker.allow():
+            logger.debug(f"> Skipped query: ADS circuit is {cls.breaker.state}")
+            return None
+
         params = {
             "q": query,
             "fl": "reference,doi,abstract,title,first_author,bibcode,year",
         }
 
-        try:
-            logger.debug("> Sending API request")
-            response = requests.get(API_ENDPOINT, headers=cls.headers, params=params)
-            response.raise_for_status()
-
-            logger.debug("> Received API response")
-            if b"<!DOCTYPE html>" in response.content:
-                raise requests.exceptions.RequestException("ADS is currently under maintenance")
-            data = response.json()
+        with LogUtils.timed("ads.query", service="ADS") as operation:
+            try:
+                logger.debug("> Sending API request")
+                response = requests.get(API_ENDPOINT, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+                operation["bytes"] = len(response.content)
+                operation["status"] = response.status_code
+                response.raise_for_status()
+
+                logger.debug("> Received API response")
+                if b"<!DOCTYPE html>" in response.content:
+                    raise requests.exceptions.RequestException("ADS is currently under maintenance")
+                data = response.json()
+
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"> Failed to query: {str(e)}")
+                operation["outcome"] = "error"
+                if e.response.status_code >= 500 or e.response.status_code == 429:
+                    cls.breaker.record_failure()
+                else:
+                    cls.breaker.record_success()
+                return None
+            except Exception as e:
+                logger.error(f"> Failed to query: {str(e)}")
+                operation["outcome"] = "error"
+                cls.breaker.record_failure()
+                return None
+
+            cls.breaker.record_success()
             docs = data.get('response', {}).get('docs', [])
             if not docs:
-                raise requests.exceptions.RequestException("No results found")
-            result = docs[0]
+                logger.error("> Failed to query: No results found")
+                operation["outcome"] = "not_found"
+                return None
+        result = docs[0]
 
-        except Exception as e:
-            logger.error(f"> Failed to query: {str(e)}")
-            return None
-        
         return cls._process(result, get_references=get_references)
     
     @classmethod
@@ -1,30 +1,49 @@
 # Standard library imports
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # Third-party imports
 
 from src.utils.text import TextUtils
 from src.utils.dict import DictUtils
+from src.utils.title_index import TitleIndex
+from src.utils.lru_cache import LRUCache
+from src.utils.log import LogUtils
 
 from src.article_api.arxiv_api import ArxivQuery
 from src.article_api.crossref_api import CrossrefQuery
 from src.article_api.ads_api import AdsQuery
 
-from src.llm_api.open import OpenAPI
+from src.llm_api.factory import LLMFactory
 
 logger = logging.getLogger(__name__)
 
+# Number of references resolved concurrently
+MAX_WORKERS = 8
+# Upper bounds of unstructured references sent in one reference_parse request
+REFERENCE_CHUNK_SIZE = 25
+REFERENCE_CHUNK_CHARS = 8000
+# Parsed unstructured references kept for reuse, bounded for --watch and --serve
+REFERENCE_CACHE_ENTRIES = 10000
+# Minimum title similarity to reuse the sbkey of a known article
+KNOWN_TITLE_THRESHOLD = 0.9
+
 class ArticleAPI:
+    _reference_cache = LRUCache(max_entries=REFERENCE_CACHE_ENTRIES)
+    _known_titles = TitleIndex(threshold=KNOWN_TITLE_THRESHOLD)
+    _known_years = {}
+
     ##
     # Getting Data
     @classmethod
-    def get_data(cls, title, author):
+    def get_data(cls, title, author, identifiers=None):
         """
         Get article data from the database
 
         Args:
             title (str): Title of the article
             author (str): Author of the article
+            identifiers (dict): Known doi, arxiv_id and bibcode of the article
 
         Returns:
             dict: Article data
@@ -50,7 +69,7 @@ class ArticleAPI:
         }
 
         logger.debug(f"Start data collection for {data['title']}")
-        data = cls._get_data(data)
+        data = cls._get_data(data, identifiers or {})
         data = cls._get_missing_data(data)
         data["key"] = TextUtils.generate_sbkey(
             data["title"],
@@ -64,25 +83,85 @@ class ArticleAPI:
             )
 
         logger.debug(f"Data collection complete for {data['title']}")
+        for status in cls.health():
+            if status["state"] != "closed":
+                logger.warning(f"> {status['service']} circuit is {status['state']}: {status}")
         return data
 
+    @staticmethod
+    def health():
+        """
+        Get circuit breaker status of each article service
+
+        Returns:
+            list[dict]: Status of arXiv, Crossref and ADS
+        """
+        return [
+            ArxivQuery.breaker.status(),
+            CrossrefQuery.breaker.status(),
+            AdsQuery.breaker.status(),
+        ]
+
     @classmethod
-    def _get_data(cls, data):
+    def _get_data(cls, data, identifiers):
+        data = cls._get_data_by_identifiers(data, identifiers)
+
         logger.debug(f"Getting data with title for {data['title']}")
         title = data["title"]
         author = data["first_author"]
 
-        result = ArxivQuery.with_title(title, author)
-        data = cls._merge_arxiv_data(data, result)
+        if data["arxiv_id"] is None:
+            result = ArxivQuery.with_title(title, author)
+            data = cls._merge_arxiv_data(data, result)
 
-        result = CrossrefQuery.with_title(title, author)
-        data = cls._merge_crossref_data(data, result)
+        if data["crossref_doi"] is None:
+            result = CrossrefQuery.with_title(title, author)
+            data = cls._merge_crossref_data(data, result)
 
-        result = AdsQuery.with_title(title, author)
-        data = cls._merge_ads_data(data, result)
+        if data["ads_bibcode"] is None:
+            result = AdsQuery.with_title(title, author)
+            data = cls._merge_ads_data(data, result)
 
         return data
 
+    @classmethod
+    def _get_data_by_identifiers(cls, data, identifiers):
+        doi = identifiers.get("doi")
+        arxiv_id = TextUtils.get_arxiv_id(identifiers.get("arxiv_id")) or TextUtils.get_arxiv_id(doi)
+        bibcode = identifiers.get("bibcode")
+        if not (doi or arxiv_id or bibcode):
+            return data
+
+        logger.debug(f"Getting data with identifiers for {data['title']}")
+        if arxiv_id:
+            result = ArxivQuery.with_arxiv(arxiv_id)
+            data = cls._merge_arxiv_data(data, cls._verify_title(data, result))
+
+        # arXiv DOIs are registered with DataCite, not Crossref
+        if doi and not TextUtils.get_arxiv_id(doi):
+            result = CrossrefQuery.with_doi(doi)
+            data = cls._merge_crossref_data(data, cls._verify_title(data, result))
+
+        if bibcode:
+            result = AdsQuery.with_bibcode(bibcode)
+        elif doi:
+            result = AdsQuery.with_doi(doi)
+        else:
+            result = AdsQuery.with_arxiv(arxiv_id)
+        data = cls._merge_ads_data(data, cls._verify_title(data, result))
+
+        return data
+
+    @staticmethod
+    def _verify_title(data, result):
+        if result is None or not data["title"]:
+            return result
+        if TextUtils.similar(data["title"], result["title"]):
+            return result
+
+        logger.debug(f"> Identifier result does not match title: {result['title']}")
+        return None
+
     @classmethod
     def _get_missing_data(cls, data):
         logger.debug(f"Getting missing data for {data['title']}")
@@ -145,6 +224,8 @@ class ArticleAPI:
         if result is None:
             return data
         
+        # Keep journal year from Crossref or ADS over preprint year
+        result.pop("year")
         result["arxiv_doi"] = result.pop("doi")
         result["arxiv_summary"] = result.pop("summary")
         data = DictUtils.merge(data, result)
@@ -259,7 +340,97 @@ class ArticleAPI:
 
     @staticmethod
     def get_basic_data_with_unstructured(unstructured_data):
-        return OpenAPI.reference_parse(unstructured_data)
+        return LLMFactory.create().reference_parse(unstructured_data)
+
+    ##
+    # Parsing Unstructured References
+    @classmethod
+    def parse_unstructured(cls, unstructured):
+        """
+        Parse unstructured references with cache, in concurrent chunks
+
+        Args:
+            unstructured (list[str]): Unstructured references
+
+        Returns:
+            list[dict]: Parsed references aligned with the input, None for failed entries
+        """
+        keys = [TextUtils.clean(text) for text in unstructured]
+        parsed = {}
+        missing = {}
+        for key, text in zip(keys, unstructured):
+            if key in parsed or key in missing:
+                continue
+            entry = cls._reference_cache.get(key)
+            if entry is None:
+                missing[key] = text
+            else:
+                parsed[key] = entry
+
+        if missing:
+            chunks = cls._chunk_references(list(missing.items()))
+            logger.debug(f"> Parsing {len(missing)} unstructured references in {len(chunks)} chunks")
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                results = executor.map(LogUtils.bind(cls._parse_chunk), chunks)
+
+                for chunk, entries in zip(chunks, results):
+                    for (key, _), entry in zip(chunk, entries):
+                        if entry:
+                            cls._reference_cache.put(key, entry)
+                            parsed[key] = entry
+
+        return [dict(parsed[key]) if key in parsed else None for key in keys]
+
+    @staticmethod
+    def _chunk_references(references):
+        chunks = []
+        chunk = []
+        chunk_chars = 0
+        for reference in references:
+            length = len(reference[1])
+            if chunk and (len(chunk) >= REFERENCE_CHUNK_SIZE or chunk_chars + length > REFERENCE_CHUNK_CHARS):
+                chunks.append(chunk)
+                chunk = []
+                chunk_chars = 0
+            chunk.append(reference)
+            chunk_chars += length
+        if chunk:
+            chunks.append(chunk)
+
+        return chunks
+
+    @classmethod
+    def _parse_chunk(cls, chunk):
+        try:
+            parsed = LLMFactory.create().reference_parse([text for _, text in chunk])
+        except Exception as e:
+            logger.error(f"> Failed to parse references: {str(e)}")
+            return [None] * len(chunk)
+
+        return cls._align_parsed(chunk, parsed)
+
+    @staticmethod
+    def _align_parsed(chunk, parsed):
+        result = [None] * len(chunk)
+        if not isinstance(parsed, list):
+            logger.error("> Failed to align parsed references: unexpected response")
+            return result
+
+        indices = [entry.get("index") if isinstance(entry, dict) else None for entry in parsed]
+        if all(isinstance(i, int) and 1 <= i <= len(chunk) for i in indices):
+            for i, entry in zip(indices, parsed):
+                result[i - 1] = entry
+        elif len(parsed) == len(chunk):
+            result = [entry if isinstance(entry, dict) else None for entry in parsed]
+        else:
+            logger.error(f"> Failed to align parsed references: {len(parsed)} results for {len(chunk)} references")
+            return result
+
+        for entry in result:
+            if entry:
+                entry.pop("index", None)
+
+        return result
 
     ##
     # Generating SBKey
@@ -271,7 +442,7 @@ class ArticleAPI:
 
         structured, unstructured = cls._filter_unstructured(data)
         if len(unstructured) > 0:
-            unstructured = OpenAPI.reference_parse(unstructured)
+            unstructured = [x for x in cls.parse_unstructured(unstructured) if x]
 
         result = cls._list_to_sbkey(
             structured + unstructured
@@ -296,18 +467,156 @@ class ArticleAPI:
     
     @classmethod
     def _list_to_sbkey(cls, data):
+        identifiers = [cls._reference_identifier(data_entry) for data_entry in data]
+        unique = {}
+        for identifier, data_entry in zip(identifiers, data):
+            unique.setdefault(identifier, data_entry)
+
+        logger.debug(f"> Resolving {len(unique)} unique references out of {len(data)}")
+        cls._prefetch_basic_data(list(unique.values()))
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            sbkeys = dict(zip(unique, executor.map(LogUtils.bind(cls._resolve_sbkey), unique.values())))
+
         result = []
-        for data_entry in data:
-            sbkey = cls._dict_to_sbkey(data_entry)
+        for identifier in identifiers:
+            sbkey = sbkeys[identifier]
             if sbkey:
                 result.append(sbkey)
 
         return result
-                
+
+    @classmethod
+    def _resolve_sbkey(cls, data):
+        try:
+            # Identifiers are exact, titles are only trusted without one
+            if cls._reference_identifier(data)[0] in ("arxiv", "doi", "bibcode"):
+                return cls._dict_to_sbkey(data)
+            return cls._find_known_sbkey(data) or cls._dict_to_sbkey(data)
+        except Exception as e:
+            logger.error(f"> Failed to resolve reference: {str(e)}")
+            return None
+
+    ##
+    # Known Titles
+    @classmethod
+    def add_known_title(cls, sbkey, title, year=None):
+        """
+        Register title of a local note or resolved reference
+
+        Args:
+            sbkey (str): Key of the article
+            title (str): Title of the article
+            year (int): Year of the article
+        """
+        if not sbkey or not isinstance(title, str) or not title:
+            return
+        cls._known_titles.add(sbkey, title)
+        cls._known_years[sbkey] = str(year) if year else None
+
+    @classmethod
+    def _find_known_sbkey(cls, data):
+        title = data.get("title") or data.get("article-title") or data.get("series-title")
+        if not title:
+            return None
+
+        # Same titles in different years are errata or other versions
+        year = str(data["year"]) if data.get("year") else None
+        if year is None:
+            return None
+        for sbkey, _ in cls._known_titles.search(title):
+            if cls._known_years.get(sbkey) == year:
+                logger.debug(f"> Matched known article: {sbkey}")
+                return sbkey
+
+        return None
+
+    @staticmethod
+    def _reference_identifier(data):
+        arxiv_id = ArticleAPI._reference_arxiv_id(data)
+        if arxiv_id:
+            return ("arxiv", arxiv_id)
+        doi = data.get("doi") or data.get("DOI")
+        if doi:
+            return ("doi", doi.lower())
+        if data.get("bibcode"):
+            return ("bibcode", data["bibcode"])
+        if data.get("unstructured"):
+            return ("unstructured", TextUtils.clean(data["unstructured"]))
+
+        title = data.get("title") or data.get("article-title") or data.get("series-title")
+        if title:
+            # Different papers can share a title and year, the first author tells them apart
+            first_author = data.get("first_author") or TextUtils.get_author(data.get("author"))
+            surname = TextUtils.clean(TextUtils.get_last_name(first_author))
+            return ("title", TextUtils.clean(title), str(data.get("year")), surname)
+
+        # Nothing to deduplicate on, keep the entry on its own
+        return ("entry", id(data))
+
+    @staticmethod
+    def _reference_arxiv_id(data):
+        return (
+            TextUtils.get_arxiv_id(data.get("arxiv_id") or data.get("eprint"))
+            or TextUtils.get_arxiv_id(data.get("doi") or data.get("DOI"))
+            or TextUtils.get_arxiv_id(data.get("bibcode"))
+        )
+
+    ##
+    # Prefetching Basic Data
+    @classmethod
+    def _prefetch_basic_data(cls, data):
+        missing = [data_entry for data_entry in data if not cls._has_basic_data(data_entry)]
+        if not missing:
+            return
+
+        cls._prefetch_arxiv(missing)
+        missing = [data_entry for data_entry in missing if not cls._has_basic_data(data_entry)]
+        cls._prefetch_crossref(missing)
+
+    @staticmethod
+    def _has_basic_data(data):
+        title = data.get("title") or data.get("article-title") or data.get("series-title")
+        first_author = data.get("first_author") or data.get("author")
+        return bool(title and first_author and data.get("year"))
+
+    @staticmethod
+    def _fill_basic_data(data, result):
+        for field in ("title", "first_author", "year"):
+            if not data.get(field):
+                data[field] = result.get(field)
+
+    @classmethod
+    def _prefetch_arxiv(cls, data):
+        arxiv_entries = [(cls._reference_arxiv_id(data_entry), data_entry) for data_entry in data]
+        arxiv_entries = [(arxiv_id, data_entry) for arxiv_id, data_entry in arxiv_entries if arxiv_id]
+        if not arxiv_entries:
+            return
+
+        logger.debug(f"> Prefetching {len(arxiv_entries)} references from arXiv")
+        results = ArxivQuery.with_arxiv_ids([arxiv_id for arxiv_id, _ in arxiv_entries])
+        for arxiv_id, data_entry in arxiv_entries:
+            if arxiv_id in results:
+                cls._fill_basic_data(data_entry, results[arxiv_id])
+
+    @classmethod
+    def _prefetch_crossref(cls, data):
+        doi_entries = [(data_entry.get("doi") or data_entry.get("DOI"), data_entry) for data_entry in data]
+        doi_entries = [(doi, data_entry) for doi, data_entry in doi_entries if doi]
+        if not doi_entries:
+            return
+
+        logger.debug(f"> Prefetching {len(doi_entries)} references from Crossref")
+        results = CrossrefQuery.with_dois([doi for doi, _ in doi_entries])
+        for doi, data_entry in doi_entries:
+            if doi in results:
+                cls._fill_basic_data(data_entry, results[doi])
+
     @classmethod
     def _dict_to_sbkey(cls, data):
         if "unstructured" in data:
-            data = cls.get_basic_data_with_unstructured(data["unstructured"])
+            data = cls.parse_unstructured([data["unstructured"]])[0]
+            if not data:
+                return None
 
         data["title"] = data.pop("article-title") if "article-title" in data else data.get("title")
         data["title"] = (
@@ -330,7 +639,7 @@ class ArticleAPI:
             data = cls.get_basic_data(
                 data.get("title"),
                 data.get("first_author"),
-                data.get("doi"),
+                data.get("doi") or data.get("DOI"),
                 data.get("bibcode")
             )
 
@@ -338,8 +647,11 @@ class ArticleAPI:
         if not data or "title" not in data:
             return None
 
-        return TextUtils.generate_sbkey(
+        sbkey = TextUtils.generate_sbkey(
             data["title"],
             data["first_author"],
             data["year"]
-        )
\ No newline at end of file
+        )
+        cls.add_known_title(sbkey, data["title"], data["year"])
+
+        return sbkey
\ No newline at end of file
@@ -1,32 +1,92 @@
 import logging
-
-import arxiv
+import threading
 
 from src.utils.text import TextUtils
+from src.utils.log import LogUtils
 from src.utils.warn import WarningProcessor
 
+from src.article_api.circuit_breaker import CircuitBreaker
+
 logger = logging.getLogger(__name__)
 
+# arXiv IDs requested in a single id_list query
+ID_BATCH_SIZE = 100
+
 class ArxivQuery:
-    client = arxiv.Client()
+    _client = None
+    _client_lock = threading.Lock()
+    breaker = CircuitBreaker("arXiv")
+
+    @classmethod
+    def get_client(cls):
+        if cls._client is None:
+            with cls._client_lock:
+                if cls._client is None:
+                    import arxiv
+                    client = arxiv.Client(page_size=ID_BATCH_SIZE)
+                    # Responses are read inside the client, count their size for the operation log
+                    client._session.hooks["response"].append(
+                        lambda response, *args, **kwargs: LogUtils.add_bytes(len(response.content))
+                    )
+                    cls._client = client
+        return cls._client
 
     @classmethod
     def _query(cls, query, title=None):
         logger.debug(f"> Query: {query}")        
-        search = arxiv.Search(query=query, max_results=1, sort_by=arxiv.SortCriterion.Relevance)
-        
-        try:    
-            logger.debug("> Sending API request")
-            results = cls.client.results(search)
-
-            logger.debug("> Received API response")
-            result = next(results)
-        except Exception as e:
-            logger.error(f"> Failed to query: {e}")
+        if not cls.breaker.allow():
+            logger.debug("> Skipped query: arXiv circuit is open")
             return None
 
+        import arxiv
+
+        search = arxiv.Search(query=query, max_results=1, sort_by=arxiv.SortCriterion.Relevance)
+        
+        with LogUtils.timed("arxiv.query", service="arXiv") as operation:
+            try:
+                logger.debug("> Sending API request")
+                results = cls.get_client().results(search)
+
+                logger.debug("> Received API response")
+                result = next(results)
+            except StopIteration:
+                logger.error("> Failed to query: No results found")
+                operation["outcome"] = "not_found"
+                cls.breaker.record_success()
+                return None
+            except Exception as e:
+                logger.error(f"> Failed to query: {e}")
+                operation["outcome"] = "error"
+                operation["error"] = str(e)
+                cls._record_error(e)
+                return None
+
+        cls.breaker.record_success()
         return cls._process(result, title)
 
+    @classmethod
+    def _record_error(cls, e):
+        """
+        Count transport errors, 5xx and 429 responses against the circuit,
+        other responses (e.g. 400 for a malformed ID) show arXiv is up
+
+        Returns:
+            bool: True if the error was a failure of the service
+        """
+        import arxiv
+        import requests
+
+        if isinstance(e, arxiv.HTTPError):
+            failure = e.status >= 500 or e.status == 429
+        else:
+            failure = isinstance(e, (requests.exceptions.RequestException, arxiv.UnexpectedEmptyPageError))
+
+        if failure:
+            cls.breaker.record_failure()
+        else:
+            cls.breaker.record_success()
+        return failure
+
 
     @staticmethod
     def _process(data,title=None):
@@ -36,6 +96,8 @@ class ArxivQuery:
             "title": data.title,
             "first_author": data.authors[0].name,
 
+            "year": data.published.year,
+
             "arxiv_id": data.entry_id.split('/')[-1],
             "doi": data.doi,
             "summary": data.summary
@@ -75,3 +137,88 @@ class ArxivQuery:
         if author:
             query += f" AND au:{author}"
         return cls._query(query, title)
+
+    @classmethod
+    def with_arxiv(cls, arxiv_id):
+        """
+        Query arXiv API with arXiv ID
+
+        Args:
+            arxiv_id (str): arXiv ID of the article
+
+        """
+        logger.debug("Getting data by arXiv ID")
+        return cls.with_arxiv_ids([arxiv_id]).get(arxiv_id)
+
+    @classmethod
+    def with_arxiv_ids(cls, arxiv_ids):
+        """
+        Query arXiv API with list of arXiv IDs, in batches of ID_BATCH_SIZE
+
+        Args:
+            arxiv_ids (list[str]): arXiv IDs of the articles
+
+        Return:
+            dict: Article data keyed by requested arXiv ID, missing if not found
+        """
+        logger.debug(f"Getting data by {len(arxiv_ids)} arXiv IDs")
+        requested = {}
+        for arxiv_id in arxiv_ids:
+            base_id = TextUtils.get_arxiv_id(arxiv_id)
+            if base_id:
+                requested.setdefault(base_id, []).append(arxiv_id)
+            else:
+                logger.error(f"> Invalid arXiv ID: {arxiv_id}")
+
+        base_ids = list(requested)
+        fetched = {}
+        for i in range(0, len(base_ids), ID_BATCH_SIZE):
+            batch = base_ids[i:i + ID_BATCH_SIZE]
+            if cls._fetch_ids(batch, fetched) and len(batch) > 1:
+                # One bad or withdrawn ID fails the whole id_list, query the batch one by one
+                logger.debug(f"> Querying {len(batch)} arXiv IDs one by one")
+                for base_id in batch:
+                    cls._fetch_ids([base_id], fetched)
+
+        result = {}
+        for base_id, ids in requested.items():
+            if fetched.get(base_id) is None:
+                continue
+            for arxiv_id in ids:
+                result[arxiv_id] = dict(fetched[base_id])
+
+        return result
+
+    @classmethod
+    def _fetch_ids(cls, batch, fetched):
+        """
+        Query a single id_list and add the articles to fetched
+
+        Returns:
+            bool: True if arXiv rejected the request, e.g. for a malformed ID
+        """
+        import arxiv
+
+        logger.debug(f"> Query: {len(batch)} arXiv IDs")
+        if not cls.breaker.allow():
+            logger.debug("> Skipped query: arXiv circuit is open")
+            return False
+
+        search = arxiv.Search(id_list=batch, max_results=len(batch))
+        with LogUtils.timed("arxiv.id_list", service="arXiv", count=len(batch)) as operation:
+            try:
+                logger.debug("> Sending API request")
+                results = {
+                    TextUtils.get_arxiv_id(data.get_short_id()): cls._process(data)
+                    for data in cls.get_client().results(search)
+                }
+                logger.debug("> Received API response")
+            except Exception as e:
+                logger.error(f"> Failed to query: {e}")
+                operation["outcome"] = "error"
+                operation["error"] = str(e)
+                return not cls._record_error(e)
+
+        cls.breaker.record_success()
+        fetched.update(results)
+        return False
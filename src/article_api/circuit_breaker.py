@@ -0,0 +1,104 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+DISABLED = "disabled"
+
+class CircuitBreaker:
+    """
+    Circuit breaker for an article service
+
+    Opens after consecutive failures and short-circuits calls until the
+    cool-down passes, then lets a single probe through (half-open). A
+    service that can not be used at all, such as one without an API key,
+    is disabled and every call is short-circuited.
+    """
+    def __init__(self, service, failure_threshold=3, cooldown=60):
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Check if a call to the service is allowed
+
+        Returns:
+            bool: False if the call should be short-circuited
+        """
+        with self._lock:
+            if self.state == DISABLED:
+                self.rejected += 1
+                return False
+
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self._transition(HALF_OPEN)
+
+            if self.state == HALF_OPEN:
+                if self.probing:
+                    self.rejected += 1
+                    return False
+                self.probing = True
+
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.probing = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.probing = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                if self.state != OPEN:
+                    self._transition(OPEN)
+
+    def disable(self, reason):
+        with self._lock:
+            if self.state != DISABLED:
+                logger.warning(f"{self.service} disabled: {reason}")
+                self.state = DISABLED
+
+    def status(self):
+        with self._lock:
+            return {
+                "service": self.service,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+            }
+
+    def _transition(self, state):
+        if state == OPEN:
+            logger.warning(f"{self.service} circuit opened after {self.consecutive_failures} failures, retrying in {self.cooldown}s")
+        elif state == HALF_OPEN:
+            logger.info(f"{self.service} circuit half-open, probing service")
+        else:
+            logger.info(f"{self.service} circuit closed, service recovered")
+        self.state = state
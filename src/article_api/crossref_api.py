@@ -1,15 +1,50 @@
 import logging
 
-# Query related
-from crossref_commons.iteration import iterate_publications_as_json
-from crossref_commons.retrieval import get_publication_as_json
+# Query related, crossref_commons is imported on first query
+import json
 
 from src.utils.text import TextUtils
+from src.utils.log import LogUtils
 from src.utils.warn import WarningProcessor
 
+from src.article_api.circuit_breaker import CircuitBreaker
+
 logger = logging.getLogger(__name__)
 
+# DOIs requested in a single filter query
+DOI_BATCH_SIZE = 50
+SELECT_FIELDS = ["DOI", "title", "author", "issued", "abstract"]
+
 class CrossrefQuery:
+    breaker = CircuitBreaker("Crossref")
+
+    @classmethod
+    def _call(cls, operation_name, query, *args, **kwargs):
+        if not cls.breaker.allow():
+            logger.debug("> Skipped query: Crossref circuit is open")
+            return None
+
+        logger.debug("> Sending API request")
+        with LogUtils.timed(operation_name, service="Crossref") as operation:
+            try:
+                result = query(*args, **kwargs)
+            except StopIteration:
+                result = None
+            except Exception as e:
+                # Includes JSON decode errors from maintenance or HTML pages
+                logger.error(f"> Failed to query: {str(e)}")
+                operation["outcome"] = "error"
+                operation["error"] = str(e)
+                cls.breaker.record_failure()
+                return None
+
+            if not result:
+                # Service responded, but the article does not exist
+                logger.error("> Failed to query: No results found")
+                operation["outcome"] = "not_found"
+
+        cls.breaker.record_success()
+        return result or None
 
     @staticmethod
     def _process(data, title=None, get_references=False):
@@ -61,14 +96,11 @@ class CrossrefQuery:
         if author:
             query["query.author"] = author
 
-        logger.debug("> Sending API request")
-        try:
-            result = next(iterate_publications_as_json(max_results=1,queries=query))
-        except Exception as e:
-            logger.error(f"> Failed to query: {str(e)}")
-            return None
+        query["rows"] = 1
+
+        items = cls._call("crossref.query", cls._get_works, query)
         
-        return cls._process(result, title, get_references=get_references)
+        return cls._process(items[0] if items else None, title, get_references=get_references)
     
 
     @classmethod
@@ -86,11 +118,72 @@ class CrossrefQuery:
         logger.debug("Getting data by DOI")
         logger.debug(f"> Query: {doi}")
 
-        logger.debug("> Sending API request")
-        try:
-            result = get_publication_as_json(doi)
-        except Exception as e:
-            logger.error(f"> Failed to query: {str(e)}")
-            return None
+        result = cls._call("crossref.doi", cls._get_publication, doi)
         
         return cls._process(result, get_references=get_references)
+
+    @classmethod
+    def with_dois(cls, dois, get_references=False):
+        """
+        Query Crossref API with list of DOIs, in batches of DOI_BATCH_SIZE
+
+        Args:
+            dois (list[str]): DOIs of the articles
+
+        Return:
+            dict: Article data keyed by requested DOI, missing if not found
+        """
+        logger.debug(f"Getting data by {len(dois)} DOIs")
+        requested = {}
+        for doi in dois:
+            # Commas separate filter values
+            if doi and "," not in doi:
+                requested.setdefault(doi.lower(), []).append(doi)
+
+        select = SELECT_FIELDS + (["reference"] if get_references else [])
+        keys = list(requested)
+        fetched = {}
+        for i in range(0, len(keys), DOI_BATCH_SIZE):
+            batch = keys[i:i + DOI_BATCH_SIZE]
+            logger.debug(f"> Query: {len(batch)} DOIs")
+            params = {
+                "filter": ",".join(f"doi:{doi}" for doi in batch),
+                "select": ",".join(select),
+                "rows": len(batch),
+            }
+            items = cls._call("crossref.doi_filter", cls._get_works, params)
+            for item in items or []:
+                fetched[item.get("DOI", "").lower()] = cls._process(item, get_references=get_references)
+
+        result = {}
+        for key, requested_dois in requested.items():
+            if fetched.get(key) is None:
+                continue
+            for doi in requested_dois:
+                result[doi] = dict(fetched[key])
+
+        return result
+
+    @staticmethod
+    def _get_publication(doi):
+        from crossref_commons.config import API_URL
+        from crossref_commons.http_utils import remote_call, uenc
+
+        code, result = remote_call(API_URL, f"works/{uenc(doi)}")
+        LogUtils.add_bytes(len(result.encode("utf-8")))
+        if code == 404:
+            return None
+        if code != 200:
+            raise ConnectionError(f"API returned code {code}")
+        return json.loads(result).get("message")
+
+    @staticmethod
+    def _get_works(params):
+        from crossref_commons.config import API_URL
+        from crossref_commons.http_utils import remote_call
+
+        code, result = remote_call(API_URL, "works", params=params)
+        LogUtils.add_bytes(len(result.encode("utf-8")))
+        if code != 200:
+            raise ConnectionError(f"API returned code {code}")
+        return json.loads(result)["message"]["items"]
@@ -0,0 +1,96 @@
+import sys
+import json
+import time
+import logging
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+def read_questions(file):
+    """
+    Read questions from JSONL, one JSON object with "question" (or a JSON string) per line
+
+    Lines that are not valid questions are kept with an "error", so they get
+    an error result instead of aborting the batch
+    """
+    questions = []
+    for idx, line in enumerate(file):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError as e:
+            logger.error(f"Invalid JSON on line {idx + 1}: {e}")
+            questions.append({"id": idx, "question": None, "error": f"Invalid JSON: {e}"})
+            continue
+        if isinstance(entry, str):
+            entry = {"question": entry}
+        if not isinstance(entry, dict):
+            questions.append({"id": idx, "question": None, "error": "Expected a JSON object or string"})
+            continue
+        entry.setdefault("id", idx)
+        if not isinstance(entry.get("question"), str) or not entry["question"].strip():
+            entry["error"] = "Missing question"
+        questions.append(entry)
+
+    return questions
+
+def answer_question(kb, entry):
+    start = time.perf_counter()
+    result = {
+        "id": entry.get("id"),
+        "question": entry.get("question"),
+    }
+    if entry.get("error"):
+        result["error"] = entry["error"]
+        result["timings"] = {"total_ms": 0.0}
+        return result
+
+    try:
+        answer = kb.qna(entry["question"])
+        result["answer"] = answer.get("answer")
+        result["references"] = answer.get("references", [])
+        result["keys"] = answer.get("keys", [])
+        result["timings"] = answer.get("timings", {})
+    except Exception as e:
+        logger.error(f"Failed to answer question {entry['id']}: {e}")
+        result["error"] = str(e)
+        result["timings"] = {}
+    result["timings"]["total_ms"] = (time.perf_counter() - start) * 1000
+
+    return result
+
+def run_batch(load_kb, input_path, output_path, workers=4):
+    """
+    Answer questions concurrently against a single KnowledgeBase
+
+    Args:
+        load_kb (callable): Creates the KnowledgeBase
+        input_path (str): JSONL file with questions, "-" for stdin
+        output_path (str): JSONL file for answers, "-" for stdout
+        workers (int): Number of questions answered concurrently
+    """
+    output = sys.stdout if output_path == "-" else open(output_path, "w")
+    try:
+        # Progress messages go to stderr so stdout only has answers
+        with redirect_stdout(sys.stderr):
+            if input_path == "-":
+                questions = read_questions(sys.stdin)
+            else:
+                with open(input_path, "r") as f:
+                    questions = read_questions(f)
+            logger.info(f"Answering {len(questions)} questions with {workers} workers")
+
+            kb = load_kb()
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for result in executor.map(lambda entry: answer_question(kb, entry), questions):
+                        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                        output.flush()
+            finally:
+                kb.close()
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -1,6 +1,18 @@
 import argparse
 import logging
 
+from src.utils.profile import Profiler
+from src.utils.log import LogUtils
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: '{value}'")
+    return number
+
 def setup_parser():
     parser = argparse.ArgumentParser(
         prog='Swing By',
@@ -11,6 +23,64 @@ def setup_parser():
         action='store_true',
         help='Enable debug mode'
         )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and reprocess notes as they change'
+        )
+    parser.add_argument(
+        '--batch',
+        metavar='FILE',
+        help='Answer questions from JSONL file ("-" for stdin) and exit'
+        )
+    parser.add_argument(
+        '--output',
+        metavar='FILE',
+        default='-',
+        help='JSONL file to write batch answers to (default: stdout)'
+        )
+    parser.add_argument(
+        '--workers',
+        type=positive_int,
+        default=4,
+        help='Number of questions answered concurrently in batch mode'
+        )
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Keep KnowledgeBase loaded and answer queries over local HTTP'
+        )
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Address to serve on (default: 127.0.0.1)'
+        )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='Port to serve on (default: 8765)'
+        )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Time main phases and print a summary at exit'
+        )
+    parser.add_argument(
+        '--profile-output',
+        metavar='FILE',
+        help='Also write cProfile stats to FILE (implies --profile)'
+        )
+    parser.add_argument(
+        '--import-time',
+        action='store_true',
+        help='Report time spent importing each dependency and exit'
+        )
+    parser.add_argument(
+        '--log-json',
+        action='store_true',
+        help='Write swing-by.log as JSON lines with timed operations'
+        )
     
 
     return parser
@@ -22,14 +92,10 @@ def parse_args():
 
     # Set logger
     level = logging.DEBUG if args.debug else logging.INFO
-    logger = logging.getLogger()
-    # Create file handler and set formatter
-    file_handler = logging.FileHandler('swing-by.log')
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    # Add handler to logger and set level
-    logger.addHandler(file_handler)
-    logger.setLevel(level)
+    LogUtils.setup(level, json_format=args.log_json)
+
+    if args.profile or args.profile_output:
+        Profiler.enable(args.profile_output)
 
     return args
     
\ No newline at end of file
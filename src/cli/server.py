@@ -0,0 +1,109 @@
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+class KnowledgeRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API over a resident KnowledgeBase
+
+    GET  /health
+    GET  /search?q=...&n=5
+    POST /search {"query": "...", "n": 5}
+    POST /qna    {"query": "..."}
+    """
+    kb = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send(200, {
+                "status": "ok",
+                "entries": len(self.kb),
+            })
+            return
+        if url.path == "/search":
+            params = parse_qs(url.query)
+            self._search({
+                "query": params.get("q", [""])[0],
+                "n": params.get("n", [5])[0],
+            })
+            return
+        self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send(400, {"error": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(payload, dict):
+            self._send(400, {"error": "Request body must be a JSON object"})
+            return
+
+        if url.path == "/search":
+            self._search(payload)
+            return
+        if url.path == "/qna":
+            if not payload.get("query"):
+                self._send(400, {"error": "Missing query"})
+                return
+            self._handle(lambda: self.kb.qna(payload["query"]))
+            return
+        self._send(404, {"error": "Not found"})
+
+    def _search(self, payload):
+        if not payload.get("query"):
+            self._send(400, {"error": "Missing query"})
+            return
+        try:
+            n = int(payload.get("n", 5))
+            if n < 1:
+                raise ValueError(n)
+        except (TypeError, ValueError):
+            self._send(400, {"error": "n must be a positive integer"})
+            return
+        self._handle(lambda: {"results": self.kb.search(payload["query"], n)})
+
+    def _handle(self, request):
+        try:
+            result = request()
+        except Exception as e:
+            logger.error(f"Failed to handle {self.path}: {e}")
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, result)
+
+    def _send(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} - {format % args}")
+
+def create_server(kb, host="127.0.0.1", port=8765):
+    """
+    Create HTTP server sharing a single KnowledgeBase across request threads
+    """
+    handler = type("Handler", (KnowledgeRequestHandler,), {"kb": kb})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def serve(kb, host="127.0.0.1", port=8765):
+    server = create_server(kb, host, port)
+    print(f"SB: Serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("SB: Stopped serving")
+    finally:
+        server.server_close()
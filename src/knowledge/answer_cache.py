@@ -0,0 +1,196 @@
+import os
+import time
+import pickle
+import logging
+import threading
+
+import numpy as np
+
+from src.utils.file import FileUtils
+from src.utils.log import LogUtils
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 1000
+STATE_VERSION = 1
+
+class AnswerCache:
+    """
+    Answers of past questions, reused for semantically similar questions
+
+    An entry matches a new question when the cosine similarity of their
+    query embeddings reaches the threshold. Each entry records the hash of
+    every note its context was built from, and is dropped as soon as any
+    of those notes changes or is removed. Entries are scoped to the
+    knowledge bases they were answered from, so a federated answer is
+    never reused for a single knowledge base or another set of them.
+    """
+    def __init__(self, threshold=0.95, max_entries=MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries = []
+        self.embeddings = np.zeros((0, 0))
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        # Answers added since the last save
+        self.unsaved = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=float)
+        return vector / (np.linalg.norm(vector) or 1)
+
+    ##
+    # Lookup
+    def get(self, query_embedding, scope=None, current=None):
+        """
+        Find cached answer of the most similar question
+
+        Args:
+            query_embedding (list[float]): Embedding of the question
+            scope (tuple): Names of the knowledge bases answered from, None for a single one
+            current (callable): Current hash of a note key, for callers that do not
+                invalidate entries as notes change; a stale match is dropped
+
+        Returns:
+            dict: Cached answer, None on a miss
+        """
+        vector = self._unit(query_embedding)
+        with self._lock:
+            best = None
+            if self.entries and self.embeddings.shape[1] == len(vector):
+                similarity = self.embeddings @ vector
+                in_scope = np.array([entry.get("scope") == scope for entry in self.entries])
+                similarity = np.where(in_scope, similarity, -np.inf)
+                i = int(np.argmax(similarity))
+                if similarity[i] >= self.threshold:
+                    best = self.entries[i]
+
+            if best is not None and current is not None and any(
+                current(key) != hash for key, hash in best["hashes"].items()
+            ):
+                logger.debug(f"> Dropped stale cached answer for: {best['query']}")
+                del self.entries[i]
+                self._rebuild()
+                best = None
+
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            best["used"] = time.time()
+            logger.debug(f"> Answer cache hit for: {best['query']}")
+            return dict(best["answer"])
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    ##
+    # Updating
+    def add(self, query, query_embedding, answer, hashes, scope=None):
+        """
+        Cache answer of a question
+
+        Args:
+            query (str): Question text
+            query_embedding (list[float]): Embedding of the question
+            answer (dict): Answer to reuse
+            hashes (dict): Hash of each note in the context, by key
+            scope (tuple): Names of the knowledge bases answered from, None for a single one
+        """
+        vector = self._unit(query_embedding)
+        with self._lock:
+            if self.entries and self.embeddings.shape[1] != len(vector):
+                # Embedding model changed, old questions can not be compared
+                self.entries = []
+            now = time.time()
+            self.entries.append({
+                "query": query,
+                "embedding": vector,
+                "answer": dict(answer),
+                "hashes": dict(hashes),
+                "scope": scope,
+                "used": now,
+            })
+            if len(self.entries) > self.max_entries:
+                self.entries.sort(key=lambda entry: entry["used"])
+                del self.entries[:len(self.entries) - self.max_entries]
+            self._rebuild()
+            self.unsaved += 1
+
+    def invalidate(self, key, hash=None):
+        """
+        Drop answers built from a note whose hash is no longer hash
+
+        Args:
+            key (str): Key of the changed note
+            hash (str): Current hash of the note, None if it was removed
+        """
+        with self._lock:
+            kept = [
+                entry for entry in self.entries
+                if key not in entry["hashes"] or entry["hashes"][key] == hash
+            ]
+            if len(kept) == len(self.entries):
+                return
+            logger.debug(f"> Invalidated {len(self.entries) - len(kept)} cached answers using {key}")
+            self.entries = kept
+            self._rebuild()
+
+    def _rebuild(self):
+        if self.entries:
+            self.embeddings = np.stack([entry["embedding"] for entry in self.entries])
+        else:
+            self.embeddings = np.zeros((0, 0))
+        self.dirty = True
+
+    ##
+    # Persistence
+    def save(self, file_path):
+        with self._lock:
+            if not self.dirty:
+                return
+            state = {"version": STATE_VERSION, "entries": self.entries}
+            data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            with LogUtils.timed("answers.save", entries=len(self.entries), bytes=len(data)):
+                FileUtils.write_atomic(file_path, data)
+            self.dirty = False
+            self.unsaved = 0
+        logger.debug(f"> Saved {len(self.entries)} cached answers to {file_path}")
+
+    @classmethod
+    def load(cls, file_path, **kwargs):
+        """
+        Load answers saved by save, or an empty cache if there are none
+        """
+        cache = cls(**kwargs)
+        if not os.path.exists(file_path):
+            return cache
+        try:
+            with LogUtils.timed("answers.load") as operation:
+                data = FileUtils.read_bytes(file_path)
+                operation["bytes"] = len(data)
+            state = pickle.loads(data)
+            if state.get("version") != STATE_VERSION:
+                raise ValueError(f"unsupported version {state.get('version')}")
+        except FileNotFoundError:
+            return cache
+        except Exception as e:
+            logger.error(f"Error loading answer cache, starting empty: {e}")
+            return cache
+
+        cache.entries = state["entries"][-cache.max_entries:]
+        cache._rebuild()
+        cache.dirty = False
+        return cache
@@ -5,6 +5,7 @@ from src.knowledge.knowledge import Knowledge
 
 from src.utils.md import MarkdownUtils
 from src.utils.text import TextUtils
+from src.utils.profile import Profiler
 
 #TODO Article API
 class Article(Knowledge):
@@ -28,18 +29,30 @@ class Article(Knowledge):
         self._query_article_data()
         super()._generate_entry()
 
+    @Profiler.timed("note.bibtex")
     def _extract_bibtex_data(self):
         bibtex_metadata = MarkdownUtils.extract_bibtex(self.body)
         self.metadata.update(bibtex_metadata)
 
+    @Profiler.timed("note.article_data")
     def _query_article_data(self):
         data = ArticleAPI.get_data(
             self.metadata.get("title"),
             self.metadata.get("author"),
+            self._identifiers(),
         )
         self.metadata.update(data)
         self.key = self.metadata.get("key")
 
+    def _identifiers(self):
+        found = TextUtils.extract_identifiers(self.body)
+        identifiers = {
+            "doi": self.metadata.get("doi"),
+            "arxiv_id": TextUtils.get_arxiv_id(self.metadata.get("eprint")) or self.metadata.get("arxiv_id"),
+            "bibcode": self.metadata.get("bibcode"),
+        }
+        return {k: v or found[k] for k, v in identifiers.items()}
+
     ##
     # Create keywords
     def create_keywords(self, example=None):
@@ -110,6 +123,6 @@ class Article(Knowledge):
 
         data = ArticleAPI.get_data(
             self.metadata.get("title"), 
-            TextUtils.get_author(self.metadata.get("author")), 
-            self.metadata.get("year"))
+            self.metadata.get("author"), 
+            self._identifiers())
         self.metadata.update(data)
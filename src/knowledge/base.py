@@ -1,7 +1,11 @@
 
 import os
+import sys
 import glob
+import time
 import logging
+import functools
+import threading
 
 import pandas
 import numpy as np
@@ -10,29 +14,61 @@ from typing import Type
 from pathlib import Path
 
 import warnings
-from tables.exceptions import PerformanceWarning
 
 from src.utils.config import Config
 from src.utils.file import FileUtils
+from src.utils.profile import Profiler
+from src.utils.log import LogUtils
+from src.utils.lru_cache import LRUCache
 
 from src.knowledge.knowledge import Knowledge
 from src.knowledge.factory import KnowledgeFactory
+from src.knowledge.graph import CitationGraph
+from src.knowledge.bm25 import BM25Index
+from src.knowledge.answer_cache import AnswerCache
 
-from src.llm_api.open import OpenAPI
+from src.llm_api.factory import LLMFactory
+from src.article_api.article_api import ArticleAPI
 
 logger = logging.getLogger(__name__)
-warnings.filterwarnings('ignore', category=PerformanceWarning)
-warnings.simplefilter('ignore', category=PerformanceWarning)
+# Reciprocal rank fusion constant, damps the weight of top ranks
+RRF_K = 60
+# Notes retrieved for QnA before MMR re-ranking picks the context
+MMR_CANDIDATES = 20
+# Changed notes between DB saves while reconciling the note directory
+SAVE_INTERVAL = 50
+# New cached answers between answer cache saves, close saves the rest
+ANSWER_SAVE_INTERVAL = 20
+
+# PyTables PerformanceWarning on pickled object columns, matched by message
+# so tables is only imported by pandas when the DB is read or written
+warnings.filterwarnings('ignore', message=r"[\s\S]*PyTables will pickle")
+
+# HDF5 is not safe for concurrent use, even on different files
+_hdf_lock = threading.Lock()
 
 
 class KnowledgeBase:
-    def __init__(self, T: Type[Knowledge]):
-        logger.debug(f"Initializing KnowledgeBase with {T}")
-        print(f"SB: Loading KnowledgeBase")
+    # Set while reconciling files, so saves are batched instead of one per note
+    _reconciling = False
+    _unsaved = 0
+
+    def __init__(self, T: Type[Knowledge], note_directory=None, name="default"):
+        logger.debug(f"Initializing KnowledgeBase {name} with {T}")
+        print(f"SB: Loading KnowledgeBase {name}")
         self.T = T
-        self.db_path = os.path.join(Config.knowledgebase(), ".database", "db.h5")
-        self.note_directory = Config.knowledgebase()
-        self.notes = {}
+        self.name = name
+        self.note_directory = note_directory or Config.knowledgebase()
+        self.db_path = os.path.join(self.note_directory, ".database", "db.h5")
+        # Writers build a new DataFrame and swap it in, so readers such as
+        # server threads never see self.db mutated in place
+        self._write_lock = threading.RLock()
+        self.notes = LRUCache(sizeof=self._note_size, **Config.note_cache())
+        self.graph = CitationGraph()
+        self.lexical_path = os.path.join(self.note_directory, ".database", "bm25.pkl")
+        self.lexical = BM25Index.load(self.lexical_path)
+        self.answers_path = os.path.join(self.note_directory, ".database", "answers.pkl")
+        self.answers = AnswerCache.load(self.answers_path, threshold=Config.answer_cache_threshold())
         self.local_files = {Path(f).stem for f in glob.glob(os.path.join(self.note_directory, "*.md"))}
         self._load_db()
 
@@ -40,57 +76,157 @@ class KnowledgeBase:
 
     ##
     # DB Related
+    @Profiler.timed("db.load")
     def _load_db(self):
         logger.debug(f"> Loading DB from {self.db_path}")
         try:
-            self.db = pandas.read_hdf(self.db_path, key="knowledge")
+            with LogUtils.timed("db.load", kb=self.name) as operation, _hdf_lock:
+                self.db = pandas.read_hdf(self.db_path, key="knowledge")
+                operation["bytes"] = os.path.getsize(self.db_path)
+                operation["entries"] = len(self.db.index)
             logger.debug(f"Loaded {len(self.db.index)} entries from DB")
         except Exception as e:
             logger.error(f"Error loading DB: {e}")
             logger.info("Creating new DB")
-            os.makedirs(os.path.join(Config.knowledgebase(), ".database"), exist_ok=True)
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             self.db = pandas.DataFrame(columns=[
                 "key", "hash", "updated", "keywords", "file_name"    
             ])
             self.save_db()
+            return
 
+        # A malformed row only loses its own titles and citations, never the DB
+        for _, row in self.db.iterrows():
+            try:
+                self._add_known_title(row)
+                self.graph.set_references(row.get("key"), self._references(row))
+            except Exception as e:
+                logger.error(f"Error indexing DB entry {row.get('key')}, skipped: {e}")
+        self._sync_cited_by()
+
+    def _save_changes(self):
+        """
+        Save DB after a note changed, every SAVE_INTERVAL notes while reconciling
+        """
+        if self._reconciling:
+            self._unsaved += 1
+            if self._unsaved < SAVE_INTERVAL:
+                return
+        self.save_db()
+
+    @Profiler.timed("db.save")
     def save_db(self):
+        self._unsaved = 0
         try:
-            with pandas.HDFStore(self.db_path, mode='w') as store:
-                store.put('knowledge', self.db)
+            with LogUtils.timed("db.save", kb=self.name, entries=len(self.db.index)) as operation, _hdf_lock:
+                with pandas.HDFStore(self.db_path, mode='w') as store:
+                    store.put('knowledge', self.db)
+                operation["bytes"] = os.path.getsize(self.db_path)
         except Exception as e:
             logger.error(f"Error saving DB: {e}")
             exit()
         logger.info(f"> Saved {len(self.db.index)} entries to DB")
 
     def append_db_entry(self, entry):
+        if "cited_by" in entry:
+            entry["cited_by"] = self.graph.cited_by(entry["key"])
         new_df = pandas.DataFrame.from_dict([entry])
         self.db = pandas.concat([self.db, new_df]).drop_duplicates(subset='key', keep='last').reset_index(drop=True)
+        self._add_known_title(entry)
+        self._add_references(entry)
         logger.debug(f"> Appended to DB: {entry['key']}")
 
+    @staticmethod
+    def _add_known_title(entry):
+        year = entry.get("year")
+        ArticleAPI.add_known_title(
+            entry.get("key"),
+            entry.get("title"),
+            year if pandas.notna(year) else None
+            )
+
+    @staticmethod
+    def _references(entry):
+        references = entry.get("ref")
+        return list(references) if isinstance(references, (list, tuple, np.ndarray)) else []
+
+    def _add_references(self, entry):
+        self._update_cited_by(self.graph.set_references(entry.get("key"), self._references(entry)))
+
+    def _update_cited_by(self, keys):
+        """
+        Rewrite cited_by of the entries whose citations changed
+        """
+        if not keys or "cited_by" not in self.db:
+            return
+        db = self.db.copy()
+        for i in db.index[db["key"].isin(list(keys))]:
+            db.at[i, "cited_by"] = self.graph.cited_by(db.at[i, "key"])
+        self.db = db
+
+    def _index_note(self, note, entry):
+        self.answers.invalidate(note.key, entry["hash"])
+        if self.lexical.is_current(note.key, entry["hash"]):
+            return
+        title = entry.get("title")
+        self.lexical.add(note.key, f"{title if pandas.notna(title) else ''}\n{note.body}", entry["hash"])
+
+    def save_indexes(self):
+        try:
+            self.lexical.save(self.lexical_path)
+            self.answers.save(self.answers_path)
+        except Exception as e:
+            logger.error(f"Error saving indexes: {e}")
+
+    def close(self):
+        """
+        Save indexes and cached answers not saved yet, before exiting
+        """
+        with self._write_lock:
+            self.save_indexes()
+
+    def _sync_cited_by(self):
+        # Once after loading, catches citations from notes removed while not loaded
+        if "cited_by" not in self.db:
+            return
+        self.db["cited_by"] = self.db["key"].map(self.graph.cited_by)
+
+    @Profiler.timed("qna.vector_search")
     def vector_search(self, key, vector, n=5):
-        search_df = self.db.copy()
-        search_df["distance"] = search_df[key].apply(lambda x: float('inf') if x is None else np.linalg.norm(x - vector))
-        search_df = search_df.sort_values(by='distance', ascending=False)
-        return search_df[:n]
+        db = self.db
+        dim = len(vector)
+        # Embeddings from another provider (e.g. offline vs OpenAI) have another dimension and are skipped
+        distance = db[key].apply(lambda x: np.linalg.norm(np.asarray(x) - vector) if isinstance(x, (list, np.ndarray)) and len(x) == dim else float('inf'))
+        nearest = distance.nsmallest(n).index
+        return db.loc[nearest].assign(distance=distance[nearest])
     
+    def __len__(self):
+        return len(self.db.index)
+
     def get_entry(self, key):
         return self.db[self.db['key'] == key].iloc[0]
     
     def update_entry(self, key, entry):
-        i = self.db[self.db['key'] == key].index[0]
-        self.db.loc[i] = entry
-        self.save_db()
+        if "cited_by" in entry:
+            entry["cited_by"] = self.graph.cited_by(entry["key"])
+        db = self.db.copy()
+        i = db[db['key'] == key].index[0]
+        db.loc[i] = entry
+        self.db = db
+        self._add_known_title(entry)
+        self._add_references(entry)
+        self._save_changes()
 
     ##
     # LLM Related
-    def _get_relevant_by_vector(self, query, n=5):
-        query_embedding = OpenAPI.embedding([query])[0]
+    def _get_relevant_by_vector(self, query, n=5, query_embedding=None):
+        if query_embedding is None:
+            query_embedding = LLMFactory.create().embedding([query])[0]
         embedding_keys = self.db.filter(regex="^embedding_").keys()
 
         related_rows = []
         for key in embedding_keys:
-            related_rows.append(self.vector_search(key, query_embedding, n=5))
+            related_rows.append(self.vector_search(key, query_embedding, n=n))
         
         if not related_rows:
             return pandas.DataFrame()
@@ -100,8 +236,41 @@ class KnowledgeBase:
         related_df = related_df.reset_index(drop=True)
         return related_df
     
+    def _get_relevant_by_text(self, query, n=5):
+        hits = dict(self.lexical.search(query, n))
+        if not hits:
+            return pandas.DataFrame()
+        related_df = self.db[self.db["key"].isin(list(hits))]
+        related_df = related_df.assign(bm25=related_df["key"].map(hits))
+        return related_df.sort_values("bm25", ascending=False).reset_index(drop=True)
+
+    @staticmethod
+    def _fuse(rankings, k=RRF_K):
+        """
+        Merge rankings by reciprocal rank fusion, sum of 1 / (k + rank)
+
+        Args:
+            rankings (list[DataFrame]): Related notes of each retriever, best first
+            k (int): Fusion constant
+
+        Returns:
+            DataFrame: Related notes with rrf score, best first
+        """
+        rankings = [df for df in rankings if not df.empty]
+        if not rankings:
+            return pandas.DataFrame()
+
+        scores = {}
+        for df in rankings:
+            for rank, key in enumerate(df["key"], start=1):
+                scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+
+        related_df = pandas.concat(rankings).drop_duplicates(subset='key', keep='first')
+        related_df = related_df.assign(rrf=related_df["key"].map(scores))
+        return related_df.sort_values("rrf", ascending=False, kind="stable").reset_index(drop=True)
+
     def _get_relevant_by_keywords(self, query, n=5):
-        query_keywords = OpenAPI.query_keyword_generation(query)
+        query_keywords = LLMFactory.create().query_keyword_generation(query)
         keyword_matches = self.db[self.db['keywords'].apply(lambda x: sum(k in query_keywords for k in x) > 0)].copy()
         if keyword_matches.empty:
             return pandas.DataFrame()
@@ -111,8 +280,7 @@ class KnowledgeBase:
         keyword_matches = keyword_matches.drop('match_count', axis=1)
         return keyword_matches
 
-    # TODO: Improve this function
-    def _get_relevant(self, query):
+    def _get_relevant(self, query, query_embedding=None, n=5):
         print(f"SB: > Getting relevant notes")
         if self.db.empty:
             return self.db
@@ -120,78 +288,337 @@ class KnowledgeBase:
         related_rows = []
         # Related by vector search
         print("SB: > Getting related by vector")
-        related_rows.append(self._get_relevant_by_vector(query))
-        # # Related by keywords        
-        # print("SB: > Getting related by keywords")
-        # related_rows.append(self._get_relevant_by_keywords(query))
+        related_rows.append(self._get_relevant_by_vector(query, n=n, query_embedding=query_embedding))
+        # Related by exact terms, such as error codes and identifiers
+        print("SB: > Getting related by text")
+        related_rows.append(self._get_relevant_by_text(query, n=n))
 
-        related_df = pandas.concat(related_rows).drop_duplicates(subset='key', keep='last').reset_index(drop=True)
-        return related_df
+        return self._fuse(related_rows).head(n)
+
+    def search(self, query, n=5):
+        """
+        Search notes relevant to the query
+
+        Args:
+            query (str): Query text
+            n (int): Number of results
+
+        Returns:
+            list[dict]: key, title, file_name and distance of relevant notes,
+                distance is None for notes only matched by text
+        """
+        related = self._get_relevant(query, n=n)
+        result = []
+        for _, row in related.iterrows():
+            result.append({
+                "key": row["key"],
+                "title": row.get("title"),
+                "file_name": row["file_name"],
+                "distance": float(row["distance"]) if pandas.notna(row.get("distance")) else None,
+            })
+        return result
 
     def qna(self, query):
         print("SB: Generating answer")
-        related = self._get_relevant(query)
+        start = time.perf_counter()
+        with Profiler.phase("qna.retrieval"):
+            query_embedding = LLMFactory.create().embedding([query])[0]
+            cached = self.answers.get(query_embedding)
+            if cached is not None:
+                print("SB: > Reusing cached answer")
+                cached["timings"] = {
+                    "retrieval_ms": (time.perf_counter() - start) * 1000,
+                    "context_ms": 0.0,
+                    "generation_ms": 0.0,
+                }
+                return cached
+            related = self._get_relevant(query, query_embedding=query_embedding, n=MMR_CANDIDATES)
+            if not related.empty:
+                related = self._rerank_mmr(related, query_embedding, relevance=related["rrf"] / related["rrf"].max())
+        retrieved = time.perf_counter()
+
+        with Profiler.phase("qna.context"):
+            example, keys = self._build_context(related)
+        built = time.perf_counter()
+
+        with Profiler.phase("qna.generation"):
+            answer = LLMFactory.create().qna(query, example)
+        answer["keys"] = keys
+        answer["timings"] = {
+            "retrieval_ms": (retrieved - start) * 1000,
+            "context_ms": (built - retrieved) * 1000,
+            "generation_ms": (time.perf_counter() - built) * 1000,
+        }
+
+        if answer.get("answer") and keys:
+            hashes = self.db.loc[self.db["key"].isin(keys)].set_index("key")["hash"].to_dict()
+            self.answers.add(query, query_embedding, {k: v for k, v in answer.items() if k != "timings"}, hashes)
+            if self.answers.unsaved >= ANSWER_SAVE_INTERVAL:
+                self.save_indexes()
+        logger.debug(f"> Answer cache: {self.answers.stats()}, note cache: {self.notes.stats()}")
+        return answer
 
-        token_count = 6000
+    @staticmethod
+    def _note_vectors(related, dim):
+        """
+        Unit vectors of notes, the mean of their embedding fields
+
+        Args:
+            related (DataFrame): Notes with embedding fields
+            dim (int): Dimension of the query embedding, others are ignored
+
+        Returns:
+            ndarray: One row per note, zero for notes without embeddings
+        """
+        columns = [column for column in related.columns if column.startswith("embedding_")]
+        vectors = []
+        for _, row in related[columns].iterrows():
+            embeddings = [np.asarray(x, dtype=float) for x in row if isinstance(x, (list, np.ndarray)) and len(x) == dim]
+            vectors.append(np.mean(embeddings, axis=0) if embeddings else np.zeros(dim))
+
+        vectors = np.array(vectors).reshape(len(vectors), dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    @staticmethod
+    def _rerank_mmr(related, query_embedding, relevance=None, n=5, diversity_lambda=None):
+        """
+        Pick notes by maximal marginal relevance, so near duplicates of
+        already picked notes give way to notes adding new information
+
+        Args:
+            related (DataFrame): Candidate notes with embedding fields
+            query_embedding (list[float]): Embedding of the query
+            relevance (Series): Relevance of candidates, cosine similarity to the query if None
+            n (int): Number of notes to pick
+            diversity_lambda (float): Relevance weight, from config if None
+
+        Returns:
+            DataFrame: Picked notes in order of selection
+        """
+        if diversity_lambda is None:
+            diversity_lambda = Config.mmr_lambda()
+        query = np.asarray(query_embedding, dtype=float)
+        vectors = KnowledgeBase._note_vectors(related, len(query))
+        if relevance is None:
+            relevance = vectors @ (query / (np.linalg.norm(query) or 1))
+        relevance = np.nan_to_num(np.asarray(relevance, dtype=float))
+        similarity = vectors @ vectors.T
+
+        selected = []
+        redundancy = np.zeros(len(vectors))
+        available = np.ones(len(vectors), dtype=bool)
+        for _ in range(min(n, len(vectors))):
+            score = diversity_lambda * relevance - (1 - diversity_lambda) * redundancy
+            i = int(np.argmax(np.where(available, score, -np.inf)))
+            selected.append(i)
+            available[i] = False
+            redundancy = np.maximum(redundancy, similarity[:, i])
+
+        return related.iloc[selected].reset_index(drop=True)
+
+    def _build_context(self, related, token_count=6000):
+        return self._pack_context(related, self._context_entry, token_count)
+
+    def _context_entry(self, row):
+        return f"# {row['title'] if pandas.notna(row.get('title')) else row['key']}\n{self._load_note(row['key'], row['file_name']).body}\n\n"
+
+    @staticmethod
+    def _pack_context(related, render, token_count=6000):
+        """
+        Add rendered notes to the context until the token budget runs out
+
+        Args:
+            related (DataFrame): Related notes, most relevant first
+            render (callable): Renders a row as context text
+            token_count (int): Token budget
+
+        Returns:
+            tuple: Context text and keys of added notes
+        """
         example = "Related\n"
+        keys = []
         for i, row in related.iterrows():
-            current_row = f"# {row['title'] if 'title' in row else row['key']}\n{self._load_note(row['key'], row['file_name']).body}\n\n"
+            current_row = render(row)
             token_count -= len(current_row.split()) * 2 
             if token_count < 0:
                 break
             print(f"SB: > Adding related note: {row['key']}")
             example += current_row
+            keys.append(row['key'])
 
-        answer = OpenAPI.qna(query, example)
-        return answer
+        return example, keys
 
     ##
     # Knowledge Management Related
     def _load_note(self, key, file_name):
-        file_path = os.path.join(self.note_directory, file_name)
-        if self.notes.get(key):
-            return self.notes[key]
-        else:
+        note = self.notes.get(key)
+        if note is None:
+            # Evicted or not loaded yet, body is read from disk when used
             note = self.T(
-                file_path,
-                dict(self.db.loc[self.db['key'] == key].iloc[0]) if key in self.db['key'].values else None
+                file_name,
+                dict(self.db.loc[self.db['key'] == key].iloc[0]) if key in self.db['key'].values else None,
+                note_directory = self.note_directory
                 )
-            self.notes[key] = note
-            return note
+            self._cache_note(key, note)
+        return note
+
+    def _cache_note(self, key, note):
+        # Bodies load lazily after the note is cached, re-measure when they do
+        note.on_body_change = functools.partial(self.notes.resize, key)
+        self.notes.put(key, note)
+
+    @staticmethod
+    def _note_size(note):
+        """
+        Approximate memory used by a note, its loaded body and metadata
+        including embeddings
+        """
+        def size(value):
+            if isinstance(value, np.ndarray):
+                return value.nbytes
+            if isinstance(value, (list, tuple)):
+                return sys.getsizeof(value) + sum(size(v) for v in value)
+            if isinstance(value, dict):
+                return sys.getsizeof(value) + sum(size(v) for v in value.values())
+            return sys.getsizeof(value)
+        return size(getattr(note, "_body", None)) + size(note.metadata)
 
     def _process_new_file(self, file_path):
         print(f"SB: > Processing new files: {file_path}")
         logger.debug(f"Processing new file: {file_path}")
-        note = self.T(file_path, local_files = self.local_files)
+        note = self.T(file_path, local_files = self.local_files, note_directory = self.note_directory)
 
         entry = note.db_entry()
         self.append_db_entry(entry)
-        self.notes[note.key] = note
-        self.save_db()
+        self._index_note(note, entry)
+        self._cache_note(note.key, note)
+        self._save_changes()
+        return note
 
     def _process_existing_file(self, file_path):
-        key = Path(file_path).stem
-        entry = dict(self.get_entry(key))
-        if FileUtils.calculate_hash(file_path) == entry["hash"]:
+        entry = dict(self.db[self.db['file_name'] == file_path].iloc[0])
+        key = entry["key"]
+        if self._is_file_unchanged(entry):
                 logger.debug(f"Updating references: {file_path}")
-                note =  self.T(file_path, entry, local_files = self.local_files)
+                note =  self.T(file_path, entry, local_files = self.local_files, note_directory = self.note_directory)
         else:
             print(f"SB: > Processing updated files: {file_path}")
             logger.debug(f"Processing updated file: {file_path}")
-            note = self.T(file_path, local_files = self.local_files)
+            note = self.T(file_path, local_files = self.local_files, note_directory = self.note_directory)
 
         entry = note.db_entry()
+        if note.key != key:
+            # Key changed (e.g. a preprint got its DOI), drop what was indexed under the old one
+            logger.debug(f"Key changed from {key} to {note.key}")
+            cited = self.graph.remove(key)
+            self.lexical.remove(key)
+            self.answers.invalidate(key)
+            self.notes.pop(key, None)
         self.update_entry(key, entry)
-        self.notes[note.key] = note
+        if note.key != key:
+            self._update_cited_by(cited)
+        self._index_note(note, entry)
+        self._cache_note(note.key, note)
+        return note
+
+    def _process_file(self, file, exists):
+        # Key of the note for every operation logged while processing it
+        key = self.db.loc[self.db["file_name"] == file, "key"].iloc[0] if exists else Path(file).stem
+        with LogUtils.context(key=key), LogUtils.timed("note.process", kb=self.name, file=file, change="existing" if exists else "new") as operation:
+            if exists:
+                note = self._process_existing_file(file)
+            else:
+                note = self._process_new_file(file)
+            operation["key"] = note.key
+        self.local_files.add(Path(file).stem)
+
+    def is_unchanged(self, file):
+        """
+        Check if a note file still has the hash stored in the DB, e.g. right
+        after the knowledge base wrote it
+
+        Args:
+            file (str): File name of the note
+        """
+        entry = self.db[self.db["file_name"] == file]
+        if entry.empty:
+            return False
+        try:
+            return self._is_file_unchanged(dict(entry.iloc[0]))
+        except FileNotFoundError:
+            return False
+
+    def _is_file_unchanged(self, entry):
+        """
+        Compare a note file with its DB entry by size and mtime, and by
+        hash only when those differ, so unchanged files are not read
+        """
+        file_path = os.path.join(self.note_directory, entry["file_name"])
+        stat = os.stat(file_path)
+        if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            return True
+        return FileUtils.calculate_hash(file_path) == entry["hash"]
+
+    def process_file(self, file):
+        """
+        Process new or changed note file in the knowledge base directory
+
+        Args:
+            file (str): File name of the note
+        """
+        with self._write_lock:
+            self._process_file(file, (self.db["file_name"] == file).any())
+            self.save_indexes()
 
+    def remove_file(self, file):
+        """
+        Remove entries of deleted note file
+
+        Args:
+            file (str): File name of the note
+        """
+        with self._write_lock:
+            self._remove_file(file)
+
+    def _remove_file(self, file):
+        removed = self.db["file_name"] == file
+        if not removed.any():
+            return
+
+        print(f"SB: > Removing deleted file: {file}")
+        cited = set()
+        for key in self.db[removed]["key"]:
+            self.notes.pop(key, None)
+            cited |= self.graph.remove(key)
+            self.lexical.remove(key)
+            self.answers.invalidate(key)
+        self.local_files.discard(Path(file).stem)
+        self.db = self.db[~removed].reset_index(drop=True)
+        self._update_cited_by(cited)
+        self.save_db()
+        self.save_indexes()
+
+    @Profiler.timed("files.reconcile")
     def _process_files(self):
         note_files = set(os.path.basename(f) for f in glob.glob(os.path.join(self.note_directory, "*.md")))
         db_files = set(self.db["file_name"].tolist())
 
-        for file in note_files:
-            if file not in db_files:
-                self._process_new_file(file)
-            else:
-                self._process_existing_file(file)
-            self.local_files.add(file)
+        self._reconciling = True
+        try:
+            for file in note_files:
+                self._process_file(file, file in db_files)
+        finally:
+            self._reconciling = False
+            if self._unsaved:
+                self.save_db()
+
+        # Drop notes removed while the knowledge base was not loaded
+        keys = set(self.db["key"])
+        for key in set(self.lexical.lengths) - keys:
+            self.lexical.remove(key)
+        for key in {key for entry in self.answers.entries for key in entry["hashes"]} - keys:
+            self.answers.invalidate(key)
+        self.save_indexes()
+        logger.debug(f"> Note cache: {self.notes.stats()}")
         #TODO: Improve existing reference update
@@ -0,0 +1,174 @@
+import os
+import re
+import math
+import pickle
+import logging
+import threading
+from collections import Counter
+
+from src.utils.file import FileUtils
+from src.utils.log import LogUtils
+
+logger = logging.getLogger(__name__)
+
+# Identifiers such as error codes, module paths and versions stay whole
+TOKEN_PATTERN = re.compile(r"\w+(?:[.:/\-]\w+)*")
+PART_PATTERN = re.compile(r"[.:/\-_]")
+STATE_VERSION = 1
+
+class BM25Index:
+    """
+    Okapi BM25 index over note text, keyed by note key
+
+    Notes are added and removed one at a time as they are ingested, so the
+    index never has to be rebuilt from every note. Compound tokens such as
+    ERR_CONNECTION_REFUSED or numpy.linalg are indexed whole and by part,
+    so exact identifiers match exactly and their words still match alone.
+    """
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.terms = {}
+        self.lengths = {}
+        self.hashes = {}
+        self.total_length = 0
+        self.dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __contains__(self, key):
+        return key in self.lengths
+
+    @staticmethod
+    def tokenize(text):
+        tokens = []
+        for token in TOKEN_PATTERN.findall((text or "").lower()):
+            tokens.append(token)
+            parts = [part for part in PART_PATTERN.split(token) if part]
+            if len(parts) > 1:
+                tokens.extend(parts)
+        return tokens
+
+    ##
+    # Updating
+    def add(self, key, text, hash=None):
+        """
+        Index text of a note, replacing its previous text
+
+        Args:
+            key (str): Key of the note
+            text (str): Text to index
+            hash (str): Hash of the note file, to skip unchanged notes later
+        """
+        counts = Counter(self.tokenize(text))
+        with self._lock:
+            self._remove(key)
+            for term, count in counts.items():
+                self.postings.setdefault(term, {})[key] = count
+            self.terms[key] = tuple(counts)
+            length = sum(counts.values())
+            self.lengths[key] = length
+            self.total_length += length
+            self.hashes[key] = hash
+            self.dirty = True
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        length = self.lengths.pop(key, None)
+        if length is None:
+            return
+        self.total_length -= length
+        self.hashes.pop(key, None)
+        for term in self.terms.pop(key, ()):
+            docs = self.postings[term]
+            del docs[key]
+            if not docs:
+                del self.postings[term]
+        self.dirty = True
+
+    def is_current(self, key, hash):
+        return key in self.lengths and self.hashes.get(key) == hash
+
+    ##
+    # Searching
+    def search(self, query, n=5):
+        """
+        Rank notes by BM25 score of the query
+
+        Args:
+            query (str): Query text
+            n (int): Number of results
+
+        Returns:
+            list[tuple]: Key and score of matching notes, best first
+        """
+        with self._lock:
+            count = len(self.lengths)
+            if not count:
+                return []
+            average_length = self.total_length / count or 1
+
+            scores = {}
+            for term in set(self.tokenize(query)):
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                for key, frequency in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.lengths[key] / average_length)
+                    scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+    ##
+    # Persistence
+    def save(self, file_path):
+        with self._lock:
+            if not self.dirty:
+                return
+            state = {
+                "version": STATE_VERSION,
+                "postings": self.postings,
+                "terms": self.terms,
+                "lengths": self.lengths,
+                "hashes": self.hashes,
+            }
+            data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            with LogUtils.timed("bm25.save", entries=len(self.lengths), bytes=len(data)):
+                FileUtils.write_atomic(file_path, data)
+            self.dirty = False
+        logger.debug(f"> Saved BM25 index of {len(self.lengths)} notes to {file_path}")
+
+    @classmethod
+    def load(cls, file_path, **kwargs):
+        """
+        Load index saved by save, or an empty index if there is none
+        """
+        index = cls(**kwargs)
+        if not os.path.exists(file_path):
+            return index
+        try:
+            with LogUtils.timed("bm25.load") as operation:
+                data = FileUtils.read_bytes(file_path)
+                operation["bytes"] = len(data)
+            state = pickle.loads(data)
+            if state.get("version") != STATE_VERSION:
+                raise ValueError(f"unsupported version {state.get('version')}")
+        except FileNotFoundError:
+            return index
+        except Exception as e:
+            logger.error(f"Error loading BM25 index, rebuilding: {e}")
+            return index
+
+        index.postings = state["postings"]
+        index.terms = state["terms"]
+        index.lengths = state["lengths"]
+        index.hashes = state["hashes"]
+        index.total_length = sum(index.lengths.values())
+        return index
@@ -1,9 +1,10 @@
 
 from src.knowledge.knowledge import Knowledge
 
-from src.utils.md import MarkdownUtils
+from src.utils.md import MarkdownDocument
+from src.utils.profile import Profiler
 
-from src.llm_api.open import OpenAPI
+from src.llm_api.factory import LLMFactory
 
 class DebugNote(Knowledge):
     ##
@@ -14,7 +15,7 @@ class DebugNote(Knowledge):
             db_entry = None,
             **kwargs
             ):
-        self.issue_body = ""
+        self._sections = None
         super().__init__(
             file_name,
             db_entry,
@@ -22,14 +23,37 @@ class DebugNote(Knowledge):
         )
         self.key = self.metadata.get("ID")
 
-    def _extract_data(self):
-        self.issue_body, _, _ = MarkdownUtils.extract_section(self.body, "Issue")
-        self.debug_body, _, _ = MarkdownUtils.extract_section(self.body, "Debug Process")
-        self.solution_body, _, _ = MarkdownUtils.extract_section(self.body, "Solution")
-        super()._extract_data()
+    ##
+    # Sections, parsed from the body when entry generation first needs them
+    @property
+    def issue_body(self):
+        return self._section_bodies()["Issue"]
+
+    @property
+    def debug_body(self):
+        return self._section_bodies()["Debug Process"]
+
+    @property
+    def solution_body(self):
+        return self._section_bodies()["Solution"]
+
+    def _section_bodies(self):
+        if self._sections is None:
+            document = MarkdownDocument(self.body)
+            self._sections = {
+                name: self._section_content(document, name)
+                for name in ("Issue", "Debug Process", "Solution")
+            }
+        return self._sections
+
+    @staticmethod
+    def _section_content(document, section_name):
+        section = document.section(section_name)
+        return document.content(section) if section else None
         
     def _generate_entry(self):
-        error_detail = OpenAPI.analyze_error(self.issue_body)
+        with Profiler.phase("note.error_analysis"):
+            error_detail = LLMFactory.create().analyze_error(self.issue_body)
         self.error_message = "\n".join(error_detail["error_message"])
         self.error_location = "\n".join(error_detail["location"])
         self.error_traceback = "\n".join(error_detail["traceback"])
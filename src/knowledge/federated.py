@@ -0,0 +1,186 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas
+import numpy as np
+
+from src.utils.config import Config
+from src.utils.profile import Profiler
+
+from src.knowledge.base import KnowledgeBase, MMR_CANDIDATES, ANSWER_SAVE_INTERVAL
+from src.knowledge.answer_cache import AnswerCache
+from src.knowledge.factory import KnowledgeFactory
+
+from src.llm_api.factory import LLMFactory
+
+logger = logging.getLogger(__name__)
+
+class FederatedKnowledgeBase:
+    """
+    Several independently indexed KnowledgeBases queried as one
+
+    Each shard keeps its own note directory, knowledge type and DB. Queries
+    are embedded once, searched on every shard in parallel and merged by
+    cosine similarity, which is comparable across shards unlike raw ranks.
+    Answers are cached for the set of shards, keyed by shard and note key,
+    and checked against the hashes in the shard DBs when reused.
+    """
+    def __init__(self, shards=None, n=5):
+        """
+        Args:
+            shards (list[dict]): name, path and type of each knowledge base, from config if None
+            n (int): Number of merged results used for QnA
+        """
+        shards = shards or Config.knowledgebases()
+        names = [shard["name"] for shard in shards]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            # Results are keyed by shard name, a duplicate would hide a whole shard
+            raise ValueError(f"Duplicate knowledge base names: {', '.join(duplicates)}, set a unique name for each")
+        self.n = n
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            loaded = executor.map(self._load_shard, shards)
+            self.shards = {shard["name"]: kb for shard, kb in zip(shards, loaded)}
+
+        self.scope = tuple(sorted(self.shards))
+        # Kept with the first shard, entries of another set of shards are never matched
+        self.answers_path = os.path.join(shards[0]["path"], ".database", "federated_answers.pkl")
+        self.answers = AnswerCache.load(self.answers_path, threshold=Config.answer_cache_threshold())
+
+    @staticmethod
+    def _load_shard(shard):
+        return KnowledgeBase(
+            KnowledgeFactory.create(shard["type"]),
+            note_directory=shard["path"],
+            name=shard["name"],
+        )
+
+    def __len__(self):
+        return sum(len(kb) for kb in self.shards.values())
+
+    ##
+    # LLM Related
+    @staticmethod
+    def _score(distance):
+        """
+        Cosine similarity from the Euclidean distance of vector search
+
+        Assumes unit length embeddings, as the OpenAI and offline providers
+        return, so |a - b|^2 = 2 - 2 cos(a, b)
+        """
+        return 1 - np.asarray(distance, dtype=float) ** 2 / 2
+
+    def _get_relevant(self, query, n=None, query_embedding=None):
+        """
+        Search every shard in parallel and merge the top results by score
+
+        Returns:
+            DataFrame: Related notes with shard and score, best first
+        """
+        n = n or self.n
+        if query_embedding is None:
+            query_embedding = LLMFactory.create().embedding([query])[0]
+
+        def search_shard(item):
+            name, kb = item
+            related = kb._get_relevant(query, query_embedding=query_embedding, n=n)
+            if related.empty:
+                return None
+            score = pandas.Series(self._score(related.get("distance", np.nan)), index=related.index)
+            score = score.where(np.isfinite(score))
+            # Notes matched only by text rank as the shard's weakest vector match
+            return related.assign(shard=name, score=score.fillna(score.min() if score.notna().any() else 0.0))
+
+        with ThreadPoolExecutor(max_workers=len(self.shards)) as executor:
+            related = [df for df in executor.map(search_shard, self.shards.items()) if df is not None]
+
+        if not related:
+            return pandas.DataFrame()
+        merged = pandas.concat(related, ignore_index=True)
+        return merged.sort_values("score", ascending=False, kind="stable").head(n).reset_index(drop=True)
+
+    def search(self, query, n=5):
+        """
+        Search notes relevant to the query across all shards
+
+        Returns:
+            list[dict]: shard, key, title, file_name and score of relevant notes
+        """
+        result = []
+        for _, row in self._get_relevant(query, n).iterrows():
+            result.append({
+                "shard": row["shard"],
+                "key": row["key"],
+                "title": row.get("title") if pandas.notna(row.get("title")) else None,
+                "file_name": row["file_name"],
+                "score": float(row["score"]),
+            })
+        return result
+
+    def _current_hash(self, key):
+        name, _, key = key.partition("/")
+        if name not in self.shards:
+            return None
+        db = self.shards[name].db
+        hashes = db.loc[db["key"] == key, "hash"]
+        return hashes.iloc[0] if not hashes.empty else None
+
+    def qna(self, query):
+        print("SB: Generating answer")
+        start = time.perf_counter()
+        with Profiler.phase("qna.retrieval"):
+            query_embedding = LLMFactory.create().embedding([query])[0]
+            cached = self.answers.get(query_embedding, scope=self.scope, current=self._current_hash)
+            if cached is not None:
+                print("SB: > Reusing cached answer")
+                cached["timings"] = {
+                    "retrieval_ms": (time.perf_counter() - start) * 1000,
+                    "context_ms": 0.0,
+                    "generation_ms": 0.0,
+                }
+                return cached
+            related = self._get_relevant(query, n=MMR_CANDIDATES, query_embedding=query_embedding)
+            if not related.empty:
+                related = KnowledgeBase._rerank_mmr(related, query_embedding, relevance=related["score"], n=self.n)
+        retrieved = time.perf_counter()
+
+        with Profiler.phase("qna.context"):
+            example, keys = KnowledgeBase._pack_context(
+                related,
+                lambda row: self.shards[row["shard"]]._context_entry(row),
+            )
+        built = time.perf_counter()
+
+        with Profiler.phase("qna.generation"):
+            answer = LLMFactory.create().qna(query, example)
+        answer["keys"] = keys
+        answer["timings"] = {
+            "retrieval_ms": (retrieved - start) * 1000,
+            "context_ms": (built - retrieved) * 1000,
+            "generation_ms": (time.perf_counter() - built) * 1000,
+        }
+
+        if answer.get("answer") and keys:
+            used = related[related["key"].isin(keys)]
+            hashes = {f"{row['shard']}/{row['key']}": row["hash"] for _, row in used.iterrows()}
+            self.answers.add(query, query_embedding, {k: v for k, v in answer.items() if k != "timings"}, hashes, scope=self.scope)
+            if self.answers.unsaved >= ANSWER_SAVE_INTERVAL:
+                self.save_answers()
+        logger.debug(f"> Answer cache: {self.answers.stats()}")
+        return answer
+
+    def save_answers(self):
+        try:
+            self.answers.save(self.answers_path)
+        except Exception as e:
+            logger.error(f"Error saving answer cache: {e}")
+
+    def close(self):
+        """
+        Save cached answers and indexes of every shard, before exiting
+        """
+        self.save_answers()
+        for kb in self.shards.values():
+            kb.close()
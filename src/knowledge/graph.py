@@ -0,0 +1,129 @@
+import threading
+from collections import Counter, deque
+
+class CitationGraph:
+    """
+    Citation graph keyed by sbkey
+
+    Keeps forward references and reverse citations up to date as notes
+    change, so lookups do not rescan every note's reference list. Updating
+    a note costs O(d) for d references. Co-citation is derived from the
+    reverse sets at lookup, so no table of reference pairs is stored.
+    """
+    def __init__(self):
+        self.forward = {}
+        self.reverse = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.forward)
+
+    def __contains__(self, key):
+        return key in self.forward or key in self.reverse
+
+    ##
+    # Updating
+    def set_references(self, key, references):
+        """
+        Replace references of a note
+
+        Args:
+            key (str): Key of the citing note
+            references (list[str]): Keys of cited articles
+
+        Returns:
+            set[str]: Keys whose cited_by changed
+        """
+        references = tuple(dict.fromkeys(r for r in references or [] if r and r != key))
+        with self._lock:
+            previous = self.forward.get(key, ())
+            if previous == references:
+                return set()
+            self._remove(key)
+            if references:
+                self.forward[key] = references
+                for ref in references:
+                    self.reverse.setdefault(ref, set()).add(key)
+            return set(previous) ^ set(references)
+
+    def remove(self, key):
+        """
+        Remove references of a note, citations of it from other notes stay
+
+        Returns:
+            set[str]: Keys whose cited_by changed
+        """
+        with self._lock:
+            return self._remove(key)
+
+    def _remove(self, key):
+        references = self.forward.pop(key, ())
+        for ref in references:
+            citing = self.reverse[ref]
+            citing.discard(key)
+            if not citing:
+                del self.reverse[ref]
+        return set(references)
+
+    ##
+    # Lookup
+    def references(self, key):
+        with self._lock:
+            return list(self.forward.get(key, ()))
+
+    def cited_by(self, key):
+        with self._lock:
+            return sorted(self.reverse.get(key, ()))
+
+    def co_citation(self, a, b):
+        """
+        Number of notes citing both a and b
+        """
+        with self._lock:
+            return len(self.reverse.get(a, set()) & self.reverse.get(b, set()))
+
+    def co_cited(self, key, n=None):
+        """
+        Articles most often cited together with key
+
+        Returns:
+            list[tuple]: (key, count) by count
+        """
+        with self._lock:
+            counts = Counter(
+                ref for citing in self.reverse.get(key, ()) for ref in self.forward[citing] if ref != key
+            )
+        return counts.most_common(n)
+
+    def neighbours(self, key, k=1, direction="both"):
+        """
+        Keys within k citation hops of key
+
+        Args:
+            key (str): Start key
+            k (int): Maximum hops
+            direction (str): "references", "cited_by" or "both"
+
+        Returns:
+            dict: key to hop distance, without the start key
+        """
+        with self._lock:
+            result = {}
+            queue = deque([(key, 0)])
+            seen = {key}
+            while queue:
+                current, hops = queue.popleft()
+                if hops == k:
+                    continue
+                adjacent = []
+                if direction in ("references", "both"):
+                    adjacent.extend(self.forward.get(current, ()))
+                if direction in ("cited_by", "both"):
+                    adjacent.extend(self.reverse.get(current, ()))
+                for neighbour in adjacent:
+                    if neighbour in seen:
+                        continue
+                    seen.add(neighbour)
+                    result[neighbour] = hops + 1
+                    queue.append((neighbour, hops + 1))
+            return result
@@ -6,8 +6,9 @@ from pathlib import Path
 from src.utils.config import Config
 from src.utils.file import FileUtils
 from src.utils.md import MarkdownUtils
+from src.utils.profile import Profiler
 
-from src.llm_api.open import OpenAPI
+from src.llm_api.factory import LLMFactory
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +19,14 @@ class Knowledge:
             self, 
             file_name,
             db_entry:dict=None,
+            note_directory=None,
             **kwargs
             ):
         logger.debug(f"Initializing Knowledge object with {file_name}")
         self.file_name = file_name
+        self.note_directory = note_directory or Config.knowledgebase()
+        # Called when the body is loaded or replaced, so caches can re-measure the note
+        self.on_body_change = None
         self._load_file()
         self.key = Path(file_name).stem
 
@@ -29,32 +34,65 @@ class Knowledge:
             logger.debug("> Loading database entry")
             self.metadata.update(db_entry)
             self.key = db_entry.get("key")
+            # Entries are only reused for unchanged files, so their hash still holds
+            self._hash = db_entry.get("hash")
         else:
             logger.debug("> Generating new entry")
             self._generate_entry()
         
+    @Profiler.timed("note.load")
     def _load_file(self):
         logger.debug("> Loading file")
-        file_path = os.path.join(Config.knowledgebase(), self.file_name)
-        note_lines = FileUtils.read_lines(file_path)
-        self.metadata, self.body = MarkdownUtils.extract_yaml(note_lines)
-        self.hash = FileUtils.calculate_hash(file_path)
+        self.file_path = os.path.join(self.note_directory, self.file_name)
+        with open(self.file_path, 'rb') as f:
+            self.metadata, self._body_offset = MarkdownUtils.read_frontmatter(f)
+        self._body = None
+        self._hash = None
         self._extract_data()
 
+    @property
+    def body(self):
+        if self._body is None:
+            logger.debug("> Loading body")
+            with open(self.file_path, 'rb') as f:
+                self._body = MarkdownUtils.read_body(f, self._body_offset)
+            if self.on_body_change:
+                self.on_body_change()
+        return self._body
+
+    @body.setter
+    def body(self, body):
+        self._body = body
+        if self.on_body_change:
+            self.on_body_change()
+
+    @property
+    def hash(self):
+        if self._hash is None:
+            self._hash = FileUtils.calculate_hash(self.file_path)
+        return self._hash
+
+    @hash.setter
+    def hash(self, hash):
+        self._hash = hash
+
     def _extract_data(self):
         pass
 
     def _generate_entry(self):
-        self.create_embeddings()
-        self.create_keywords()
-        self.metadata["summary"] = OpenAPI.summarize(self.body)
+        with Profiler.phase("note.embeddings"):
+            self.create_embeddings()
+        with Profiler.phase("note.keywords"):
+            self.create_keywords()
+        with Profiler.phase("note.summary"):
+            self.metadata["summary"] = LLMFactory.create().summarize(self.body)
 
     ##
     # Create keywords
     def create_keywords(self, example=None, payload=None):
         logger.debug("> Creating keywords")
         query = self._create_payload(example, payload)
-        self.metadata["keywords"] = OpenAPI.document_keyword_extraction(query)
+        self.metadata["keywords"] = LLMFactory.create().document_keyword_extraction(query)
         #TODO: Error handling?
 
     def _create_payload(self, example, payload=None):
@@ -94,7 +132,7 @@ class Knowledge:
         ] + additional_data
 
         try:
-            embeddings = OpenAPI.embedding(text)
+            embeddings = LLMFactory.create().embedding(text)
         except Exception as e:
             logger.error(f"Error creating embeddings: {e}")
             for t in text:
@@ -118,6 +156,10 @@ class Knowledge:
         result = {}
         result["key"] = self.key
         result["hash"] = self.hash
+        # Size and mtime let unchanged files be recognized without hashing them
+        stat = os.stat(self.file_path)
+        result["size"] = stat.st_size
+        result["mtime"] = stat.st_mtime
 
         result["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         result["keywords"] = self.metadata.get("keywords")
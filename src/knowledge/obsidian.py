@@ -1,3 +1,4 @@
+import io
 import logging
 import re
 import os
@@ -6,9 +7,10 @@ from pathlib import Path
 from src.knowledge.article import Article
 
 from src.utils.config import Config
-from src.utils.md import MarkdownUtils
+from src.utils.md import MarkdownUtils, MarkdownDocument
 from src.utils.file import FileUtils
-from src.utils.text import TextUtils
+from src.utils.log import LogUtils
+from src.utils.profile import Profiler
 
 logger = logging.getLogger(__name__)
 
@@ -18,11 +20,13 @@ class ObsidianNote(Article):
     def __init__(
             self,
             *args,
-            local_files = []
+            local_files = [],
+            note_directory = None
             ):
         self.local_files = local_files
         super().__init__(
-            *args
+            *args,
+            note_directory = note_directory
         )
         self.update_file()
 
@@ -38,11 +42,12 @@ class ObsidianNote(Article):
 
     ##
     # MD
+    @Profiler.timed("note.write")
     def update_file(self):
-        old_file_path = os.path.join(Config.knowledgebase(), self.file_name)
+        old_file_path = os.path.join(self.note_directory, self.file_name)
         if Path(self.file_name).stem == self.key:
             new_file_name = os.path.join( self.key + ".md")
-            new_file_path = os.path.join(Config.knowledgebase(), new_file_name)
+            new_file_path = os.path.join(self.note_directory, new_file_name)
             os.rename(old_file_path, new_file_path)
             self.file_name = new_file_name
             old_file_path = new_file_path
@@ -50,32 +55,42 @@ class ObsidianNote(Article):
         metadata = self.md_metadata()
         self._modify_section()
 
-        md_text = MarkdownUtils.create_md_text(metadata, self.body)
-        FileUtils.write(old_file_path, md_text)
-        self.hash = FileUtils.calculate_hash(old_file_path)
+        # Compare with file on disk, ignoring the updated timestamp
+        current = FileUtils.read_bytes(old_file_path)
+        current_metadata, _ = MarkdownUtils.read_frontmatter(io.BytesIO(current))
+        updated = metadata["updated"]
+        metadata["updated"] = current_metadata.get("updated", updated)
+        if MarkdownUtils.create_md_text(metadata, self.body).encode('utf-8') == current:
+            logger.debug("> File unchanged")
+            self.hash = FileUtils.hash_bytes(current)
+            return
+
+        metadata["updated"] = updated
+        md_bytes = MarkdownUtils.create_md_text(metadata, self.body).encode('utf-8')
+        with LogUtils.timed("note.write", key=self.key, file=self.file_name, bytes=len(md_bytes)):
+            FileUtils.write_atomic(old_file_path, md_bytes)
+        self.hash = FileUtils.hash_bytes(md_bytes)
 
     def _modify_section(self):
-        body = self.body
+        document = MarkdownDocument(self.body)
+        bibtex = document.section("Bibtex")
+        references = document.section("References")
+        others = document.section("Others")
         sections = {
             "References": "",
             "Bibtex": ""
         }
 
-        bibtex_body, s, e = MarkdownUtils.extract_section(body, "Bibtex")
-        if s:
-            sections["Bibtex"] = bibtex_body
-            _, body = TextUtils.trim_lines(body, s, e)
+        if bibtex:
+            sections["Bibtex"] = document.content(bibtex)
 
-        references_section, s, e = MarkdownUtils.extract_section(body, "References")
-        if s:
-            _, body = TextUtils.trim_lines(body, s, e)
-        references = self._merge_references(references_section, self.metadata.get("ref", []))
-        sections["References"] = self._create_reference_section(references)
+        references_section = document.content(references) if references else None
+        references_dict = self._merge_references(references_section, self.metadata.get("ref", []))
+        sections["References"] = self._create_reference_section(references_dict)
 
-        others_section, s, e = MarkdownUtils.extract_section(body, "Others")
-        if s:
-            _, body = TextUtils.trim_lines(body, s, e)
+        others_section = document.content(others, exclude=[bibtex, references]) if others else None
 
+        body = document.remove([bibtex, references, others])
         body = body.strip() + "\n\n"
         body += MarkdownUtils.create_others_section(others_section or "", sections)
 
@@ -0,0 +1,165 @@
+import os
+import glob
+import time
+import struct
+import select
+import logging
+import ctypes
+import ctypes.util
+
+logger = logging.getLogger(__name__)
+
+# Seconds a file must stay unchanged before it is processed
+DEBOUNCE_SECONDS = 2.0
+POLL_INTERVAL = 5.0
+
+class InotifySource:
+    """
+    Changed note files of a directory, from Linux inotify
+    """
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_DELETE = 0x00000200
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            changed.add(os.fsdecode(name))
+
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """
+    Changed note files of a directory, from comparing mtime and size
+    """
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for file_path in glob.glob(os.path.join(self.directory, "*.md")):
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            snapshot[os.path.basename(file_path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout=None):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {
+            file for file in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(file) != self.snapshot.get(file)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class KnowledgeWatcher:
+    """
+    Keep KnowledgeBase up to date with the note directory
+
+    Bursts of edits to a file are debounced, then only that file is
+    reprocessed through the KnowledgeBase.
+    """
+    def __init__(self, kb, debounce=DEBOUNCE_SECONDS, source=None):
+        self.kb = kb
+        self.debounce = debounce
+        self.source = source or self._create_source(kb.note_directory)
+        self.pending = {}
+
+    @staticmethod
+    def _create_source(directory):
+        try:
+            source = InotifySource(directory)
+            logger.info(f"Watching {directory} with inotify")
+            return source
+        except (OSError, AttributeError, TypeError) as e:
+            logger.info(f"inotify unavailable ({e}), polling {directory}")
+            return PollingSource(directory)
+
+    def run(self):
+        print(f"SB: Watching {self.kb.note_directory}")
+        try:
+            while True:
+                self.step()
+        except KeyboardInterrupt:
+            print("SB: Stopped watching")
+        finally:
+            self.source.close()
+
+    def step(self, timeout=None):
+        """
+        Wait for changes and process files that settled
+
+        Args:
+            timeout (float): Maximum seconds to wait, None waits for next change
+
+        Returns:
+            list[str]: Processed file names
+        """
+        if self.pending:
+            oldest = min(self.pending.values())
+            remaining = max(self.debounce - (time.monotonic() - oldest), 0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        changed = self.source.read(timeout)
+        now = time.monotonic()
+        for file in changed:
+            # Skip hidden and temporary files, such as atomic write targets
+            if file.endswith(".md") and not file.startswith("."):
+                self.pending[file] = now
+
+        ready = sorted(file for file, updated in self.pending.items() if now - updated >= self.debounce)
+        for file in ready:
+            del self.pending[file]
+            self._process(file)
+
+        return ready
+
+    def _process(self, file):
+        logger.debug(f"Processing changed file: {file}")
+        try:
+            if os.path.exists(os.path.join(self.kb.note_directory, file)):
+                # Notes written by the knowledge base itself already match the DB
+                if self.kb.is_unchanged(file):
+                    logger.debug(f"Skipping unchanged file: {file}")
+                    return
+                self.kb.process_file(file)
+            else:
+                self.kb.remove_file(file)
+        except Exception as e:
+            logger.error(f"Failed to process {file}: {e}")
@@ -0,0 +1,21 @@
+from src.utils.config import Config
+
+from src.llm_api.open import OpenAPI
+from src.llm_api.offline import OfflineAPI
+
+DEFAULT_PROVIDER = "openai"
+
+class LLMFactory:
+    @classmethod
+    def create(cls, provider_name=None):
+        """
+        Get LLM provider, from `llm_provider` in config if not given
+        """
+        providers = {
+            "openai": OpenAPI,
+            "offline": OfflineAPI
+        }
+        provider_name = provider_name or Config.llm_provider() or DEFAULT_PROVIDER
+        if provider_name not in providers:
+            raise ValueError(f"Unknown LLM provider: {provider_name}")
+        return providers[provider_name]
@@ -0,0 +1,164 @@
+# Standard library imports
+import re
+import logging
+import hashlib
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Dimension of hashed embedding vectors
+EMBEDDING_DIM = 256
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9]+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+YEAR_PATTERN = re.compile(r"\b(1[89]\d{2}|20\d{2})[a-z]?\b")
+QUOTED_PATTERN = re.compile(r"[\"“”']([^\"“”']{10,})[\"“”']")
+STOPWORDS = set("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each et al few for from further
+had has have having he her here hers him his how i if in into is it its itself just me more most my
+no nor not now of off on once only or other our out over own same she should so some such than that
+the their them then there these they this those through to too under until up very was we were what
+when where which while who whom why will with would you your
+""".split())
+
+class OfflineAPI:
+    """
+    Deterministic local provider with the interface of OpenAPI
+
+    Embeddings are hashed bag-of-words vectors, other outputs are rule based.
+    Nothing leaves the machine, so ingest and QnA run at local speed in CI
+    and benchmarks. Select with `llm_provider: offline` in config.
+    """
+    ##
+    # Base functions
+    @staticmethod
+    def _words(text):
+        return [word for word in WORD_PATTERN.findall((text or "").lower()) if word not in STOPWORDS]
+
+    @staticmethod
+    def _sentences(text):
+        lines = [line for line in (text or "").splitlines() if line.strip() and not line.lstrip().startswith(("#", "-", "```", "@", "|"))]
+        return [s.strip() for s in SENTENCE_PATTERN.split(" ".join(lines)) if s.strip()]
+
+    @classmethod
+    def embedding(self, text: list[str]) -> list["np.array"]:
+        import numpy as np
+
+        logger.debug("> Embedding texts offline")
+        embeddings = []
+        for t in text:
+            vector = np.zeros(EMBEDDING_DIM)
+            for word, count in Counter(self._words(t)).items():
+                digest = hashlib.md5(word.encode()).digest()
+                index = int.from_bytes(digest[:4], "little") % EMBEDDING_DIM
+                sign = 1 if digest[4] & 1 else -1
+                # Sublinear term frequency, as in TF-IDF
+                vector[index] += sign * (1 + np.log(count))
+            norm = np.linalg.norm(vector)
+            embeddings.append(vector / norm if norm else vector)
+
+        return embeddings
+
+    ##
+    # QnA functions
+    @classmethod
+    def qna(self, query: str, example:str=None ) -> dict:
+        logger.debug("> Finding answer offline")
+        query_words = set(self._words(query))
+
+        # Context is "# title" followed by note body, for each related note
+        scored = []
+        title = None
+        for block in re.split(r"^# ", example or "", flags=re.MULTILINE):
+            if not block.strip():
+                continue
+            heading, _, body = block.partition("\n")
+            if heading.strip() == "Related" and not body.strip():
+                continue
+            title = heading.strip()
+            for sentence in self._sentences(body):
+                score = len(query_words & set(self._words(sentence)))
+                if score:
+                    scored.append((score, title, sentence))
+
+        best = sorted(scored, key=lambda x: x[0], reverse=True)[:3]
+        references = list(dict.fromkeys(title for _, title, _ in best))
+        answer = " ".join(
+            f"{sentence} [{references.index(title) + 1}]" for _, title, sentence in best
+        ) or "No related notes found."
+
+        return {"answer": answer, "references": references}
+
+    ##
+    # Data generation functions
+    @classmethod
+    def query_keyword_generation(self, query:str) -> list[str]:
+        logger.debug("> Generating keywords offline")
+        words = self._words(query)
+        keywords = words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+        return list(dict.fromkeys(keywords))
+
+    @classmethod
+    def document_keyword_extraction(self, text, n=10, ratio=0.4) -> list[str]:
+        logger.debug("> Creating keywords offline")
+        counts = Counter(word for word in self._words(text) if len(word) > 2)
+        keywords = [word for word, _ in counts.most_common(n)]
+        return keywords or ["uncategorized"]
+
+    ##
+    # Data analysis functions
+    @classmethod
+    def reference_parse(self, reference_list: list[str]) -> list[dict]:
+        logger.debug("> Extracting article data offline")
+        result = []
+        for i, reference in enumerate(reference_list):
+            parsed = self._parse_reference(reference)
+            if parsed:
+                result.append({"index": i + 1} | parsed)
+
+        return result
+
+    @staticmethod
+    def _parse_reference(reference):
+        year = YEAR_PATTERN.search(reference)
+        if year is None:
+            return None
+
+        quoted = QUOTED_PATTERN.search(reference)
+        if quoted:
+            title = quoted.group(1)
+        else:
+            # Longest segment between separators that is not the author list
+            segments = [s.strip() for s in re.split(r"[.,;()]\s+|\s+\(", reference) if s.strip()]
+            segments = [s for s in segments[1:] if not YEAR_PATTERN.fullmatch(s)] or segments
+            title = max(segments, key=len)
+
+        first_author = re.split(r",|\bet al\b|\band\b", reference, maxsplit=1)[0].strip()
+        if not title or not first_author:
+            return None
+
+        return {
+            "title": title.strip(" .,"),
+            "first_author": first_author,
+            "year": int(year.group(1)),
+        }
+
+    @classmethod
+    def summarize(self, text: str) -> str:
+        logger.debug("> Summarizing text offline")
+        sentences = self._sentences(text)
+        return sentences[0] if sentences else ""
+
+    @classmethod
+    def analyze_error(self, error: str) -> dict:
+        logger.debug("> Finding root cause of error offline")
+        lines = [line.rstrip() for line in (error or "").splitlines() if line.strip()]
+        messages = [line.strip() for line in lines if re.match(r"\s*\w+(\.\w+)*(Error|Exception|Warning)\b", line)]
+        locations = [line.strip() for line in lines if line.lstrip().startswith("File ")]
+        start = next((i for i, line in enumerate(lines) if line.startswith("Traceback")), None)
+
+        return {
+            "error_message": messages[-1:] or lines[-1:],
+            "location": locations[-1:],
+            "traceback": lines[start:] if start is not None else [],
+        }
@@ -2,32 +2,44 @@
 import os
 import logging
 import json
-# Third-party imports
-import numpy as np
-# OpenAI related
-from openai import OpenAI
+import threading
 
 from src.llm_api.prompts import *
 from src.utils.config import Config
+from src.utils.log import LogUtils
 
 # Global variables
-TOKEN = os.environ["GITHUB_TOKEN"]
 API_ENDPOINT = "https://models.inference.ai.azure.com"
 logger = logging.getLogger(__name__)
 
 class OpenAPI:
-    client = OpenAI(base_url=API_ENDPOINT, api_key=TOKEN)
+    _client = None
+    _client_lock = threading.Lock()
 
     ##
     # Base functions
+    @classmethod
+    def get_client(cls):
+        """
+        Create OpenAI client on first use, importing openai is slow
+        """
+        if cls._client is None:
+            with cls._client_lock:
+                if cls._client is None:
+                    from openai import OpenAI
+                    cls._client = OpenAI(base_url=API_ENDPOINT, api_key=Config.api_key("GITHUB_TOKEN"))
+        return cls._client
+
     @classmethod
     def request_for_json(self, model, messages):
         logger.debug("> Sending OpenAI completion API request")
-        completion = self.client.beta.chat.completions.parse(
-            model = model,
-            messages = messages,
-            response_format = { "type": "json_object" }
-        )
+        with LogUtils.timed("llm.completion", service="openai", model=model) as operation:
+            completion = self.get_client().beta.chat.completions.parse(
+                model = model,
+                messages = messages,
+                response_format = { "type": "json_object" }
+            )
+            self._log_usage(operation, messages, completion)
 
         logger.debug("> Recieved OpenAI completion API responce")
         logger.debug(f"> {completion.usage}")
@@ -36,13 +48,21 @@ class OpenAPI:
 
         return json_data
     
+    @staticmethod
+    def _log_usage(operation, messages, completion):
+        operation["bytes"] = sum(len(m["content"].encode("utf-8")) for m in messages)
+        operation["prompt_tokens"] = getattr(completion.usage, "prompt_tokens", None)
+        operation["completion_tokens"] = getattr(completion.usage, "completion_tokens", None)
+
     @classmethod
     def request_for_text(self, model, messages):
         logger.debug("> Sending OpenAI completion API request")
-        completion = self.client.beta.chat.completions.parse(
-            model = model,
-            messages = messages,
-        )
+        with LogUtils.timed("llm.completion", service="openai", model=model) as operation:
+            completion = self.get_client().beta.chat.completions.parse(
+                model = model,
+                messages = messages,
+            )
+            self._log_usage(operation, messages, completion)
 
         logger.debug("> Recieved OpenAI completion API responce")
         logger.debug(f"> {completion.usage}")
@@ -52,13 +72,19 @@ class OpenAPI:
         return text_data
 
     @classmethod
-    def embedding(self, text: list[str]) -> list[np.array]:
+    def embedding(self, text: list[str]) -> list["np.array"]:
+        import numpy as np
+
         logger.debug("> Embedding texts with OpenAI")
         logger.debug("> Sending OpenAI embedding API request")
-        embedding_response = self.client.embeddings.create(
-            input = text,
-            model = Config.llm_model("embedding"),
-        )
+        model = Config.llm_model("embedding")
+        with LogUtils.timed("llm.embedding", service="openai", model=model, count=len(text)) as operation:
+            embedding_response = self.get_client().embeddings.create(
+                input = text,
+                model = model,
+            )
+            operation["bytes"] = sum(len(t.encode("utf-8")) for t in text)
+            operation["tokens"] = getattr(embedding_response.usage, "total_tokens", None)
 
         logger.debug("> Recieved OpenAI embedding API responce")
         logger.debug(f"> {embedding_response.usage}")
@@ -127,7 +153,7 @@ class OpenAPI:
         logger.debug("> Extracting article data with OpenAI")
         messages = [
             {"role":"system", "content": REFERENCE_PARSE_PROMPT},
-            {"role": "user", "content": "\n".join(reference_list)},
+            {"role": "user", "content": "\n".join(f"[{i+1}] {reference}" for i, reference in enumerate(reference_list))},
         ]
         json_data = self.request_for_json(
             Config.llm_model("reference_parse"), 
@@ -1,11 +1,11 @@
 # Standard library imports
-import os
 import logging
 import json
-import requests
+
+from src.utils.config import Config
+from src.utils.log import LogUtils
 
 # Global variables
-TOKEN = os.environ["PPLX_API_KEY"]
 API_ENDPOINT = "https://api.perplexity.ai/chat/completions"
 logger = logging.getLogger(__name__)
 
@@ -13,10 +13,12 @@ logger = logging.getLogger(__name__)
 COMPLETION_MODEL = "llama-3.1-sonar-small-128k-online"
 
 class PerplexityAPI:
-    headers = {
-        "Authorization": "Bearer " + TOKEN,
-        "Content-Type": "application/json"
-    }
+    @staticmethod
+    def headers():
+        return {
+            "Authorization": "Bearer " + Config.api_key("PPLX_API_KEY"),
+            "Content-Type": "application/json"
+        }
 
     @classmethod
     def completion(self, messages: list[dict]):
@@ -35,19 +37,26 @@ Be precise and concise.
             "stream": False,
         }
 
-        try:
-            response = requests.request("POST", API_ENDPOINT, json=payload, headers=self.headers)
-            response.raise_for_status()
+        import requests
+
+        with LogUtils.timed("llm.completion", service="perplexity", model=COMPLETION_MODEL) as operation:
+            try:
+                response = requests.request("POST", API_ENDPOINT, json=payload, headers=self.headers())
+                operation["bytes"] = len(response.content)
+                operation["status"] = response.status_code
+                response.raise_for_status()
+
+                logger.debug("> Recieved Perplexity completion API responce")
+                data = response.json()
+                logger.debug(f"> {data['usage']}")
 
-            logger.debug("> Recieved Perplexity completion API responce")
-            data = response.json()
-            logger.debug(f"> {data['usage']}")
+                return data
 
-            return data
-        
-        except Exception as e:
-            logger.error(f"Failed to complete request: {e}")
-            return None
+            except Exception as e:
+                logger.error(f"Failed to complete request: {e}")
+                operation["outcome"] = "error"
+                operation["error"] = str(e)
+                return None
 
 
 if __name__ == "__main__":
@@ -53,8 +53,10 @@ Guidelines:
 - Parse citations across different academic styles
 - Maintain consistent data structure
 - Handle variations in citation formats
+- Citations are numbered as [n], return one entry for each citation
 
 Return entries in json format with key "references" containing list of fields:
+- index: integer (number n of the citation)
 - title: string
 - first_author: string
 - year: integer
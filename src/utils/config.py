@@ -23,14 +23,80 @@ class Config:
         
         return cls._config
     
+    @staticmethod
+    def api_key(name):
+        """
+        Read API key from environment, when the service is first used
+        """
+        key = os.environ.get(name)
+        if not key:
+            raise KeyError(f"Environment variable {name} is not set")
+        return key
+
     @classmethod
     def knowledgebase(cls):
         return os.path.expanduser(cls.load_config().get("knowledgebase"))
     
+    @classmethod
+    def knowledgebases(cls):
+        """
+        Get knowledge bases to load, from `knowledgebases` list in config or
+        the single `knowledgebase` and `type`
+
+        Returns:
+            list[dict]: name, path and type of each knowledge base
+        """
+        config = cls.load_config()
+        if not config.get("knowledgebases"):
+            return [{"name": "default", "path": cls.knowledgebase(), "type": cls.type()}]
+
+        result = []
+        for entry in config["knowledgebases"]:
+            path = os.path.expanduser(entry["path"])
+            result.append({
+                "name": entry.get("name") or os.path.basename(os.path.normpath(path)),
+                "path": path,
+                "type": entry.get("type") or cls.type(),
+            })
+        return result
+
     @classmethod
     def llm_provider(cls):
         return cls.load_config().get("llm_provider")
     
+    @classmethod
+    def mmr_lambda(cls):
+        """
+        Relevance weight of MMR re-ranking, 1 keeps retrieval order and
+        lower values favour notes unlike those already in the context
+        """
+        return float(cls.load_config().get("mmr_lambda", 0.7))
+
+    @classmethod
+    def answer_cache_threshold(cls):
+        """
+        Cosine similarity a question needs to a cached question to reuse
+        its answer, above 1 disables the answer cache
+        """
+        return float(cls.load_config().get("answer_cache_threshold", 0.95))
+
+    @classmethod
+    def note_cache(cls):
+        """
+        Limits of loaded notes kept in memory, from `note_cache_entries`
+        and `note_cache_mb` (default 64 MB)
+
+        Returns:
+            dict: max_entries and max_bytes, None for no limit
+        """
+        config = cls.load_config()
+        entries = config.get("note_cache_entries")
+        mb = config.get("note_cache_mb", 64)
+        return {
+            "max_entries": int(entries) if entries is not None else None,
+            "max_bytes": int(float(mb) * 1024 * 1024) if mb is not None else None,
+        }
+
     @classmethod
     def type(cls):
         return cls.load_config().get("type")
@@ -1,5 +1,7 @@
 
+import os
 import hashlib
+import tempfile
 
 class FileUtils:
     @staticmethod
@@ -12,7 +14,36 @@ class FileUtils:
         with open(file_path, 'w') as f:
             f.write(content)
 
+    @staticmethod
+    def read_bytes(file_path: str) -> bytes:
+        with open(file_path, 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def write_atomic(file_path: str, content: bytes):
+        """
+        Write content through a temporary file renamed over file_path,
+        so readers never see a partially written file
+        """
+        directory, file_name = os.path.split(os.path.abspath(file_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{file_name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(file_path):
+                os.chmod(temp_path, os.stat(file_path).st_mode)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
     @staticmethod
     def calculate_hash(file_path: str) -> str:
         with open(file_path, 'rb') as f:
-            return hashlib.blake2b(f.read()).hexdigest()
\ No newline at end of file
+            return hashlib.blake2b(f.read()).hexdigest()
+
+    @staticmethod
+    def hash_bytes(content: bytes) -> str:
+        return hashlib.blake2b(content).hexdigest()
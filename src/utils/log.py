@@ -0,0 +1,115 @@
+import json
+import time
+import logging
+import contextlib
+import contextvars
+from datetime import datetime, timezone
+
+# Timed network and disk operations are logged here, at INFO
+OPERATION_LOGGER = "src.operations"
+operation_logger = logging.getLogger(OPERATION_LOGGER)
+
+# Fields added to every timed operation of the current context, e.g. the note key
+_context_fields = contextvars.ContextVar("log_context_fields", default={})
+# Innermost timed operation, so code deep inside it can add fields such as bytes
+_current_operation = contextvars.ContextVar("log_current_operation", default=None)
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as JSON lines, with fields of timed operations as keys
+    """
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LogUtils:
+    @staticmethod
+    def setup(level, json_format=False, file_path="swing-by.log"):
+        """
+        Set root logger to write to file, as JSON lines if json_format
+        """
+        file_handler = logging.FileHandler(file_path)
+        if json_format:
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+        logger = logging.getLogger()
+        logger.addHandler(file_handler)
+        logger.setLevel(level)
+
+        # Operation timings are for aggregation, keep human-readable logs quiet
+        operation_logger.setLevel(logging.INFO if json_format or level <= logging.DEBUG else logging.WARNING)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def timed(operation, **fields):
+        """
+        Time an operation and log it with its fields
+
+        The yielded dict can be updated inside the block, e.g. with bytes or
+        outcome. Outcome defaults to "ok", or "error" if the block raises.
+
+        Args:
+            operation (str): Operation name, e.g. "ads.query"
+            **fields: Additional fields such as service and key
+        """
+        fields = {"operation": operation} | _context_fields.get() | fields
+        token = _current_operation.set(fields)
+        start = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as e:
+            fields["outcome"] = "error"
+            fields["error"] = str(e)
+            raise
+        finally:
+            _current_operation.reset(token)
+            fields["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            fields.setdefault("outcome", "ok")
+            if operation_logger.isEnabledFor(logging.INFO):
+                details = " ".join(f"{k}={v}" for k, v in fields.items() if k != "operation")
+                operation_logger.info(f"{operation} {details}", extra={"fields": fields})
+
+    @staticmethod
+    @contextlib.contextmanager
+    def context(**fields):
+        """
+        Add fields to every operation timed inside the block, e.g. the key
+        of the note being processed
+        """
+        token = _context_fields.set(_context_fields.get() | fields)
+        try:
+            yield
+        finally:
+            _context_fields.reset(token)
+
+    @staticmethod
+    def bind(function):
+        """
+        Wrap function to run with the caller's context fields, for work
+        handed to other threads such as a ThreadPoolExecutor
+        """
+        fields = _context_fields.get()
+        def run(*args, **kwargs):
+            with LogUtils.context(**fields):
+                return function(*args, **kwargs)
+        return run
+
+    @staticmethod
+    def add_bytes(count):
+        """
+        Add transferred bytes to the innermost timed operation, if any
+        """
+        operation = _current_operation.get()
+        if operation is not None:
+            operation["bytes"] = operation.get("bytes", 0) + count
@@ -0,0 +1,96 @@
+import sys
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Least recently used cache bounded by entry count, total size or both
+
+    Sizes come from the sizeof function when a value is added, and again
+    on resize for values that grow while cached. The most recently added
+    value is always kept, even if it alone is over the size limit.
+    """
+    def __init__(self, max_entries=None, max_bytes=None, sizeof=sys.getsizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (value, size)
+            self.bytes += size
+            self._evict()
+
+    def resize(self, key):
+        """
+        Measure a cached value again after it changed in place
+        """
+        with self._lock:
+            if key not in self._data or self.max_bytes is None:
+                return
+            value, size = self._data[key]
+            resized = self.sizeof(value)
+            self._data[key] = (value, resized)
+            self.bytes += resized - size
+            self._evict()
+
+    def _evict(self):
+        while len(self._data) > 1 and self._over_limit():
+            self._pop(next(iter(self._data)))
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._pop(key)
+        return default if item is None else item[0]
+
+    def _pop(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.bytes -= item[1]
+        return item
+
+    def _over_limit(self):
+        return (
+            (self.max_entries is not None and len(self._data) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
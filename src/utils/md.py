@@ -1,49 +1,199 @@
 
 import yaml
 import re
-import bibtexparser
+
+BIBTEX_BLOCK = re.compile(r'```BibTeX(.*?)```', re.DOTALL | re.IGNORECASE)
+BIBTEX_ENTRY = re.compile(r'\s*@(\w+)\s*\{\s*([^,\s]+)\s*,')
+BIBTEX_FIELD = re.compile(r'\s*([\w\-:.]+)\s*=\s*')
+BIBTEX_BARE = re.compile(r'[^\s,{}"#=]+')
+BIBTEX_END = re.compile(r'\s*\}\s*$')
 
 class MarkdownUtils:
     @staticmethod   
     def extract_yaml(markdown: list[str]):
-        while markdown[0].strip() =='':
-            markdown = markdown[1:]
-        if '---' not in markdown[0].strip():
-            return {}, ''.join(markdown)
-
-        markdown = markdown[1:]
-        for idx, line in enumerate(markdown):
-            if '---' in line.strip():
+        start = 0
+        while start < len(markdown) and markdown[start].strip() == '':
+            start += 1
+        if start == len(markdown) or '---' not in markdown[start].strip():
+            return {}, ''.join(markdown[start:])
+
+        for idx in range(start + 1, len(markdown)):
+            if '---' in markdown[idx].strip():
                 yaml_end = idx
                 break
+        else:
+            return {}, ''.join(markdown[start:])
+
+        yaml_text = ''.join(markdown[start+1:yaml_end])
+        metadata = MarkdownUtils._normalize_metadata(yaml.safe_load(yaml_text))
+
+        return metadata, ''.join(markdown[yaml_end+1:])
+
+    @staticmethod
+    def read_frontmatter(file):
+        """
+        Read YAML frontmatter from file, stopping at the closing ---
+
+        Args:
+            file (BinaryIO): File opened in binary mode, at the beginning
+
+        Returns:
+            dict: Metadata
+            int: Byte offset where the body starts
+        """
+        offset = 0
+        line = file.readline()
+        while line and line.strip() == b'':
+            offset += len(line)
+            line = file.readline()
+        if b'---' not in line.strip():
+            return {}, offset
+
+        yaml_lines = []
+        body_offset = offset + len(line)
+        for line in iter(file.readline, b''):
+            body_offset += len(line)
+            if b'---' in line.strip():
+                break
+            yaml_lines.append(line)
+        else:
+            return {}, offset
+
+        yaml_text = b''.join(yaml_lines).decode('utf-8')
+        metadata = MarkdownUtils._normalize_metadata(yaml.safe_load(yaml_text))
 
-        yaml_text = ''.join(markdown[:yaml_end])
-        metadata = yaml.safe_load(yaml_text)
+        return metadata, body_offset
+
+    @staticmethod
+    def read_body(file, offset: int):
+        """
+        Read body from file, skipping the frontmatter
+
+        Args:
+            file (BinaryIO): File opened in binary mode
+            offset (int): Byte offset from read_frontmatter
+        """
+        file.seek(offset)
+        return file.read().decode('utf-8')
+
+    @staticmethod
+    def _normalize_metadata(metadata):
+        metadata = metadata or {}
         if metadata.get("author"):
             author = metadata["author"]
             metadata["author"] = author if isinstance(author, list) else [author]
 
-        return metadata, ''.join(markdown[yaml_end+1:])
+        return metadata
     
     @staticmethod
     def extract_bibtex(body: str):
-        pattern = r'```BibTeX(.*?)```'
-        match = re.findall(pattern, body, re.DOTALL | re.IGNORECASE)
+        match = BIBTEX_BLOCK.search(body)
+        if not match:
+            return {}
+
+        entry = MarkdownUtils._parse_bibtex(match.group(1))
+        if entry is None:
+            entry = MarkdownUtils._parse_bibtex_fallback(match.group(1))
+        if entry is None:
+            return {}
 
+        key, fields = entry
         try:
-            entry = bibtexparser.parse_string(match[0]).entries[0]
-            fields_dict = entry.fields_dict
             bibtex = {
-                'bibtex_key': entry.key,
-                'title': fields_dict['title'].value,
-                'author': fields_dict['author'].value.split(' and '),
-                'year' : int(fields_dict['year'].value)
+                'bibtex_key': key,
+                'title': fields['title'],
+                'author': fields['author'].split(' and '),
+                'year' : int(fields['year'])
             }
-
-            return bibtex
-        except:
+        except (KeyError, ValueError):
             return {}
 
+        for field in ['doi', 'eprint', 'bibcode']:
+            if fields.get(field):
+                bibtex[field] = fields[field]
+        if 'bibcode' not in bibtex and fields.get('adsurl'):
+            bibtex['bibcode'] = fields['adsurl'].rstrip('/').split('/')[-1]
+
+        return bibtex
+
+    @staticmethod
+    def _parse_bibtex(text: str):
+        """
+        Parse single plain BibTeX entry
+
+        Returns:
+            tuple: Entry key and fields, None if entry needs full parser
+        """
+        match = BIBTEX_ENTRY.match(text)
+        if not match or match.group(1).lower() in ["string", "preamble", "comment"]:
+            return None
+
+        key = match.group(2)
+        fields = {}
+        i = match.end()
+        while True:
+            match = BIBTEX_FIELD.match(text, i)
+            if not match:
+                break
+            i = match.end()
+
+            if text.startswith('{', i):
+                value, i = MarkdownUtils._read_braced(text, i)
+            elif text.startswith('"', i):
+                value, i = MarkdownUtils._read_quoted(text, i)
+            else:
+                # Numbers and undefined macros such as month = dec are kept as is
+                bare = BIBTEX_BARE.match(text, i)
+                value, i = (bare.group(), bare.end()) if bare else (None, i)
+            if value is None:
+                return None
+            fields[match.group(1).lower()] = value
+
+            while i < len(text) and text[i].isspace():
+                i += 1
+            if not text.startswith(',', i):
+                break
+            i += 1
+
+        if not BIBTEX_END.match(text, i):
+            return None
+
+        return key, fields
+
+    @staticmethod
+    def _read_braced(text: str, start: int):
+        depth = 0
+        for i in range(start, len(text)):
+            if text[i] == '{':
+                depth += 1
+            elif text[i] == '}':
+                depth -= 1
+                if depth == 0:
+                    return text[start+1:i], i + 1
+        return None, start
+
+    @staticmethod
+    def _read_quoted(text: str, start: int):
+        depth = 0
+        for i in range(start + 1, len(text)):
+            if text[i] == '{':
+                depth += 1
+            elif text[i] == '}':
+                depth -= 1
+            elif text[i] == '"' and depth == 0:
+                return text[start+1:i], i + 1
+        return None, start
+
+    @staticmethod
+    def _parse_bibtex_fallback(text: str):
+        import bibtexparser
+
+        try:
+            entry = bibtexparser.parse_string(text).entries[0]
+        except Exception:
+            return None
+        return entry.key, {k.lower(): v.value for k, v in entry.fields_dict.items()}
+
     @staticmethod
     def extract_code_blocks(body: str):
         pattern = r'```(.*?)```'
@@ -52,30 +202,12 @@ class MarkdownUtils:
 
     @staticmethod
     def extract_section(body: str, section_name: str):
-        body = body.split('\n')
-        in_section = False
-        section_level = 0
-        section_start = 0
-        section_end = len(body)
-        
-        for i, line in enumerate(body):
-            if line.strip() == "":
-                continue
-            if f"# {section_name}".lower() in line.strip().lower():
-                in_section = True
-                section_level = line.split()[0].count('#')
-                section_start = i
-                continue
-            if in_section and line.strip().split()[0].count('#') == section_level:
-                section_end = i
-                break
-
-        if not in_section:
+        document = MarkdownDocument(body)
+        section = document.section(section_name)
+        if section is None:
             return None, None, None
 
-        section_text = '\n'.join(body[section_start+1:section_end])
-
-        return section_text, section_start, section_end
+        return document.content(section), section.start, section.end
 
     @staticmethod
     def create_md_text(metadata: dict, body: str):
@@ -91,9 +223,121 @@ class MarkdownUtils:
     @staticmethod
     def create_others_section(others:str, contents:dict = None):
         text = "## Others"
-        text += ("\n" + others).strip()
+        if others.strip():
+            text += "\n" + others.strip()
         for key, value in contents.items():
             text += f"\n### {key}\n"
             text += value.strip() + "\n"
 
-        return text
\ No newline at end of file
+        return text
+
+
+class MarkdownSection:
+    def __init__(self, name: str, level: int, start: int, parent=None):
+        self.name = name
+        self.level = level
+        self.start = start
+        self.end = None
+        self.parent = parent
+        self.children = []
+
+
+class MarkdownDocument:
+    """
+    Markdown body parsed in a single pass into a heading tree
+
+    Sections hold line offsets (heading line, exclusive end line), so
+    extraction, removal and replacement are lookups and splices.
+    """
+    HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+
+    def __init__(self, body: str):
+        self.lines = body.split('\n')
+        self.root = MarkdownSection(None, 0, -1)
+        self.sections = []
+        self._parse()
+
+    def _parse(self):
+        stack = [self.root]
+        in_code = False
+        for i, line in enumerate(self.lines):
+            stripped = line.strip()
+            if stripped.startswith("```") or stripped.startswith("~~~"):
+                in_code = not in_code
+                continue
+            if in_code:
+                continue
+
+            match = self.HEADING.match(stripped)
+            if not match:
+                continue
+
+            level = len(match.group(1))
+            while stack[-1].level >= level:
+                stack.pop().end = i
+
+            section = MarkdownSection(match.group(2), level, i, stack[-1])
+            stack[-1].children.append(section)
+            self.sections.append(section)
+            stack.append(section)
+
+        for section in stack:
+            section.end = len(self.lines)
+
+    def section(self, name: str):
+        """
+        Find section by heading name, exact match first then partial match
+
+        Args:
+            name (str): Heading name, case insensitive
+
+        Returns:
+            MarkdownSection: First matching section, None if not found
+        """
+        name = name.lower()
+        for section in self.sections:
+            if section.name.lower() == name:
+                return section
+        for section in self.sections:
+            if name in section.name.lower():
+                return section
+        return None
+
+    def content(self, section: MarkdownSection, exclude: list = None):
+        """
+        Get text of section without its heading
+
+        Args:
+            section (MarkdownSection): Section to get
+            exclude (list[MarkdownSection]): Sections to leave out of the text
+        """
+        exclude = exclude or []
+        keep = self._mask([x for x in exclude if x is not None])
+        return '\n'.join(
+            self.lines[i] for i in range(section.start + 1, section.end) if keep[i]
+        )
+
+    def remove(self, sections: list):
+        """
+        Get body without given sections
+
+        Args:
+            sections (list[MarkdownSection]): Sections to remove, None is ignored
+        """
+        keep = self._mask([x for x in sections if x is not None])
+        return '\n'.join(line for line, k in zip(self.lines, keep) if k)
+
+    def replace(self, section: MarkdownSection, text: str):
+        """
+        Get body with content of section replaced, heading is kept
+        """
+        return '\n'.join(
+            self.lines[:section.start + 1] + [text] + self.lines[section.end:]
+        )
+
+    def _mask(self, sections):
+        keep = [True] * len(self.lines)
+        for section in sections:
+            for i in range(section.start, section.end):
+                keep[i] = False
+        return keep
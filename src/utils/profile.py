@@ -0,0 +1,164 @@
+import sys
+import time
+import importlib
+import atexit
+import logging
+import cProfile
+import pstats
+import functools
+import threading
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+# Third-party modules in rough dependency order, then modules of this project
+IMPORT_REPORT_MODULES = [
+    "yaml", "requests", "numpy", "pandas", "tables", "openai", "arxiv",
+    "crossref_commons.retrieval", "bibtexparser",
+    "src.utils.md", "src.llm_api.open", "src.article_api.article_api",
+    "src.knowledge.factory", "src.knowledge.base",
+]
+
+class Profiler:
+    """
+    Per-phase wall-clock timers, enabled with --profile
+
+    Phases are named with dots (e.g. "note.keywords") and accumulate call
+    count, total and max time. When disabled, timers cost one attribute check.
+    """
+    enabled = False
+    output = None
+    _timings = {}
+    _started = None
+    _cprofile = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def enable(cls, output=None):
+        """
+        Start recording phases, print summary at exit
+
+        Args:
+            output (str): File to write cProfile stats to, None to skip cProfile
+        """
+        cls.reset()
+        cls.enabled = True
+        cls.output = output
+        cls._started = time.perf_counter()
+        if output:
+            # cProfile only follows the thread that enabled it
+            cls._cprofile = cProfile.Profile()
+            cls._cprofile.enable()
+        atexit.register(cls.finish)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._timings = {}
+        cls._started = time.perf_counter()
+
+    @classmethod
+    @contextlib.contextmanager
+    def phase(cls, name):
+        if not cls.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.record(name, time.perf_counter() - start)
+
+    @classmethod
+    def timed(cls, name):
+        """
+        Decorator recording each call of the function as a phase
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not cls.enabled:
+                    return func(*args, **kwargs)
+                with cls.phase(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @classmethod
+    def record(cls, name, seconds):
+        with cls._lock:
+            timing = cls._timings.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0})
+            timing["calls"] += 1
+            timing["total"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    @classmethod
+    def timings(cls):
+        with cls._lock:
+            return {name: dict(timing) for name, timing in cls._timings.items()}
+
+    @classmethod
+    def summary(cls):
+        """
+        Create table of phases sorted by name, so nested phases group together
+
+        Returns:
+            str: Summary table
+        """
+        wall = time.perf_counter() - cls._started if cls._started else 0.0
+        lines = [f"{'phase':<28} {'calls':>7} {'total s':>10} {'mean ms':>10} {'max ms':>10} {'% wall':>7}"]
+        for name, timing in sorted(cls.timings().items()):
+            share = timing["total"] / wall * 100 if wall else 0.0
+            lines.append(
+                f"{name:<28} {timing['calls']:>7} {timing['total']:>10.3f} "
+                f"{timing['total'] / timing['calls'] * 1000:>10.2f} {timing['max'] * 1000:>10.2f} {share:>6.1f}%"
+            )
+        lines.append(f"{'wall':<28} {'':>7} {wall:>10.3f}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def import_report(modules=IMPORT_REPORT_MODULES):
+        """
+        Import modules one by one and time each
+
+        Times are incremental: a module already loaded by an earlier one costs
+        nothing, so each row is what that module adds on top of the rows above.
+
+        Returns:
+            str: Report table
+        """
+        lines = [f"{'module':<32} {'ms':>9}  status"]
+        total = 0.0
+        for name in modules:
+            if name in sys.modules:
+                lines.append(f"{name:<32} {0.0:>9.1f}  already loaded")
+                continue
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+                status = "imported"
+            except Exception as e:
+                status = f"failed ({type(e).__name__})"
+            elapsed = (time.perf_counter() - start) * 1000
+            total += elapsed
+            lines.append(f"{name:<32} {elapsed:>9.1f}  {status}")
+        lines.append(f"{'total':<32} {total:>9.1f}")
+        return "\n".join(lines)
+
+    @classmethod
+    def finish(cls):
+        if not cls.enabled:
+            return
+        cls.enabled = False
+
+        if cls._cprofile:
+            cls._cprofile.disable()
+            cls._cprofile.dump_stats(cls.output)
+            print(f"SB: Saved cProfile stats to {cls.output}", file=sys.stderr)
+            pstats.Stats(cls._cprofile, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+            cls._cprofile = None
+
+        summary = cls.summary()
+        logger.info(f"Profile summary\n{summary}")
+        print(f"SB: Profile summary\n{summary}", file=sys.stderr)
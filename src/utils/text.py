@@ -1,6 +1,8 @@
 
 import re
-from difflib import SequenceMatcher
+
+DOI_PATTERN = r"\b10\.\d{4,9}/[^\s\"'<>\[\]{}|\\^`]+"
+ARXIV_ID_PATTERN = r"(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?"
 
 class TextUtils:
     @staticmethod
@@ -9,11 +11,20 @@ class TextUtils:
             return ""
         return ' '.join(re.sub(r"[^a-zA-Z0-9]+", ' ', text).split()).lower()
 
+    @classmethod
+    def ngrams(self, text, n=3):
+        text = f" {self.clean(text)} "
+        return {text[i:i+n] for i in range(max(len(text) - n + 1, 1))}
+
+    @staticmethod
+    def dice(ngrams1, ngrams2):
+        if not ngrams1 and not ngrams2:
+            return 1.0
+        return 2 * len(ngrams1 & ngrams2) / (len(ngrams1) + len(ngrams2))
+
     @classmethod
     def similar(self, text1, text2, threshold=0.8):
-        text1 = self.clean(text1)
-        text2 = self.clean(text2)
-        return SequenceMatcher(None, text1, text2).ratio() > threshold
+        return self.dice(self.ngrams(text1), self.ngrams(text2)) > threshold
 
     @classmethod
     def same(self, text1, text2):
@@ -51,6 +62,64 @@ class TextUtils:
             return value
         return ""
 
+    @staticmethod
+    def get_arxiv_id(value):
+        """
+        Get arXiv ID without version from arXiv ID, arXiv DOI or ADS bibcode
+
+        Args:
+            value (str): arXiv ID, DOI or bibcode
+
+        Returns:
+            str: arXiv ID, None if value does not refer to arXiv
+        """
+        if not isinstance(value, str):
+            return None
+        value = value.strip()
+
+        match = re.fullmatch(r"\d{4}arXiv(\d{4})\.?(\d{4,5})[A-Z.]?", value)
+        if match:
+            return f"{match.group(1)}.{match.group(2)}"
+
+        match = re.fullmatch(r"(?:10\.48550/)?arxiv[:.]?\s*" + ARXIV_ID_PATTERN, value, re.IGNORECASE)
+        if match:
+            return match.group(1)
+
+        match = re.fullmatch(ARXIV_ID_PATTERN, value)
+        if match:
+            return match.group(1)
+
+        return None
+
+    @staticmethod
+    def extract_identifiers(text):
+        """
+        Find first DOI, arXiv ID and ADS bibcode mentioned in text
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            dict: doi, arxiv_id and bibcode, None if not found
+        """
+        identifiers = {"doi": None, "arxiv_id": None, "bibcode": None}
+        if not text:
+            return identifiers
+
+        match = re.search(DOI_PATTERN, text)
+        if match:
+            identifiers["doi"] = match.group().rstrip(".,;:)")
+
+        match = re.search(r"(?:arxiv\.org/(?:abs|pdf)/|arXiv:\s*)" + ARXIV_ID_PATTERN, text, re.IGNORECASE)
+        if match:
+            identifiers["arxiv_id"] = match.group(1)
+
+        match = re.search(r"adsabs\.harvard\.edu/abs/([0-9]{4}[A-Za-z&.]{5}[\w.&]{9}[A-Z.])", text)
+        if match:
+            identifiers["bibcode"] = match.group(1)
+
+        return identifiers
+
     @staticmethod
     def format_entry(string, length):
         return string.lower().ljust(length,".")[:length].replace(" ", ".")
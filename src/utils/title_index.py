@@ -0,0 +1,82 @@
+import math
+import threading
+
+from src.utils.text import TextUtils
+
+class TitleIndex:
+    """
+    Character n-gram index for approximate title matching
+
+    Candidates are generated only from the rarest n-grams of the query
+    (prefix filtering) and verified with Dice similarity, so a search does
+    not scan every indexed title.
+    """
+    def __init__(self, threshold=0.8, n=3):
+        self.threshold = threshold
+        self.n = n
+        self.postings = {}
+        self.grams = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.grams)
+
+    def __contains__(self, key):
+        return key in self.grams
+
+    def add(self, key, title):
+        grams = TextUtils.ngrams(title, self.n)
+        with self._lock:
+            self._remove(key)
+            self.grams[key] = grams
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        grams = self.grams.pop(key, None)
+        if grams is None:
+            return
+        for gram in grams:
+            keys = self.postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def search(self, title, threshold=None):
+        """
+        Search titles similar to the given title
+
+        Args:
+            title (str): Title to search
+            threshold (float): Minimum Dice similarity, defaults to index threshold
+
+        Returns:
+            list[tuple]: (key, similarity) sorted by similarity
+        """
+        threshold = self.threshold if threshold is None else threshold
+        grams = TextUtils.ngrams(title, self.n)
+
+        # A match shares at least min_shared n-grams with the query,
+        # so it contains one of the (len(grams) - min_shared + 1) rarest ones
+        min_shared = max(math.ceil(threshold * len(grams) / (2 - threshold) - 1e-9), 1)
+        with self._lock:
+            rare = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+            candidates = set()
+            for gram in rare[:len(grams) - min_shared + 1]:
+                candidates.update(self.postings.get(gram, ()))
+
+            result = []
+            for key in candidates:
+                similarity = TextUtils.dice(grams, self.grams[key])
+                if similarity >= threshold:
+                    result.append((key, similarity))
+
+        return sorted(result, key=lambda x: x[1], reverse=True)
+
+    def best(self, title, threshold=None):
+        result = self.search(title, threshold)
+        return result[0][0] if result else None
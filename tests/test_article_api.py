@@ -4,6 +4,43 @@ from src.article_api.arxiv_api import ArxivQuery
 from src.article_api.crossref_api import CrossrefQuery
 from src.article_api.ads_api import AdsQuery
 from src.article_api.article_api import ArticleAPI
+from src.article_api.circuit_breaker import CircuitBreaker
+from src.utils.title_index import TitleIndex
+from src.utils.lru_cache import LRUCache
+from src.utils.config import Config
+
+class TestCircuitBreaker:
+    def test_opens_after_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, cooldown=60)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        assert breaker.status()["rejected"] == 1
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        assert breaker.allow()
+        assert breaker.state == "half-open"
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow()
+
+    def test_ads_without_key(self, monkeypatch):
+        monkeypatch.delenv("ADS_API_KEY", raising=False)
+        monkeypatch.setattr(AdsQuery, "breaker", CircuitBreaker("ADS"))
+        assert AdsQuery._query("title:\"anything\"") is None
+        assert AdsQuery.breaker.state == "disabled"
+        assert not AdsQuery.breaker.allow()
+        assert AdsQuery.breaker.status()["failures"] == 0
 
 class TestArxivQuery:
     @pytest.mark.parametrize("title, author, id", [
@@ -19,6 +56,46 @@ class TestArxivQuery:
         assert result["summary"] is not None
         assert isinstance(result["first_author"], str)
 
+    class FakeClient:
+        def __init__(self, status):
+            self.status = status
+            self.requests = []
+
+        def results(self, search):
+            import arxiv
+            from types import SimpleNamespace
+            self.requests.append(list(search.id_list))
+            if "9999.99999" in search.id_list:
+                raise arxiv.HTTPError("http://export.arxiv.org/api/query", 0, self.status)
+            for arxiv_id in search.id_list:
+                yield SimpleNamespace(
+                    title=f"Title {arxiv_id}",
+                    authors=[SimpleNamespace(name="Author")],
+                    published=SimpleNamespace(year=2023),
+                    entry_id=f"http://arxiv.org/abs/{arxiv_id}v1",
+                    doi=None,
+                    summary="",
+                    get_short_id=lambda arxiv_id=arxiv_id: f"{arxiv_id}v1",
+                )
+
+    def test_with_arxiv_ids_bad_id(self, monkeypatch):
+        client = self.FakeClient(400)
+        monkeypatch.setattr(ArxivQuery, "_client", client)
+        monkeypatch.setattr(ArxivQuery, "breaker", CircuitBreaker("arXiv", failure_threshold=1))
+        result = ArxivQuery.with_arxiv_ids(["2312.06071", "9999.99999", "2401.00001"])
+        assert set(result) == {"2312.06071", "2401.00001"}
+        assert len(client.requests) == 4
+        assert ArxivQuery.breaker.state == "closed"
+        assert ArxivQuery.breaker.status()["failures"] == 0
+
+    def test_with_arxiv_ids_server_error(self, monkeypatch):
+        client = self.FakeClient(503)
+        monkeypatch.setattr(ArxivQuery, "_client", client)
+        monkeypatch.setattr(ArxivQuery, "breaker", CircuitBreaker("arXiv", failure_threshold=1))
+        assert ArxivQuery.with_arxiv_ids(["2312.06071", "9999.99999"]) == {}
+        assert len(client.requests) == 1
+        assert ArxivQuery.breaker.state == "open"
+
 class TestCrossrefQuery:
     @pytest.mark.parametrize("title, author, doi", [
         ("A theoretical prediction of friction drag reduction in turbulent flow by superhydrophobic surfaces",
@@ -48,6 +125,39 @@ class TestCrossrefQuery:
         assert result["year"] is not None
         assert result["abstract"] is not None
 
+    def test_with_dois(self, monkeypatch):
+        requests = []
+        def get_works(params):
+            requests.append(params)
+            return [{
+                "DOI": "10.1063/1.2205307",
+                "title": ["Title"],
+                "author": [{"family": "Fukagata", "given": "Koji"}],
+                "issued": {"date-parts": [[2006]]},
+            }]
+        monkeypatch.setattr(CrossrefQuery, "_get_works", get_works)
+        monkeypatch.setattr("src.article_api.crossref_api.DOI_BATCH_SIZE", 2)
+
+        result = CrossrefQuery.with_dois(["10.1063/1.2205307", "10.1063/1.2205307", "10.0/a", "10.0/b"])
+        assert len(requests) == 2
+        assert "reference" not in requests[0]["select"]
+        assert list(result) == ["10.1063/1.2205307"]
+        assert result["10.1063/1.2205307"]["year"] == 2006
+
+    def test_call_outcomes(self, monkeypatch):
+        import json
+        monkeypatch.setattr(CrossrefQuery, "breaker", CircuitBreaker("Crossref", failure_threshold=1))
+        def no_results():
+            raise StopIteration
+        assert CrossrefQuery._call("crossref.query", no_results) is None
+        assert CrossrefQuery._call("crossref.doi", lambda: None) is None
+        assert CrossrefQuery.breaker.status()["failures"] == 0
+
+        def maintenance_page():
+            return json.loads("<!DOCTYPE html>")
+        assert CrossrefQuery._call("crossref.doi", maintenance_page) is None
+        assert CrossrefQuery.breaker.state == "open"
+
 class TestAdsQuery:
     @pytest.fixture
     def bibcode(self):
@@ -197,4 +307,97 @@ class TestGetData:
         for key in notnull:
             assert result[key] is not None
         
-        
\ No newline at end of file
+        
+class TestGenerateSbkey:
+    @pytest.fixture
+    def references(self):
+        return [
+            {"DOI": "10.1063/1.2205307", "key": "ref1"},
+            {"title": "Another Title", "first_author": "Test, Author", "year": 2099},
+            {"doi": "10.1063/1.2205307", "bibcode": "2006PhFl...18e1703F"},
+            {"title": "Another title!", "first_author": "Test, Author", "year": 2099},
+            {"title": "Another Title", "first_author": "Other, Author", "year": 2099},
+        ]
+
+    def test_list_to_sbkey_deduplicates(self, monkeypatch, references):
+        calls = []
+        def resolve(data):
+            calls.append(data)
+            return f"key{len(calls)}"
+        monkeypatch.setattr(ArticleAPI, "_dict_to_sbkey", resolve)
+        monkeypatch.setattr(ArticleAPI, "_prefetch_basic_data", lambda data: None)
+        monkeypatch.setattr(ArticleAPI, "_known_titles", TitleIndex())
+
+        result = ArticleAPI._list_to_sbkey(references)
+        assert len(calls) == 3
+        assert len(result) == len(references)
+        assert result[0] == result[2]
+        assert result[1] == result[3]
+        assert result[0] != result[1]
+        assert result[4] not in (result[0], result[1])
+
+    def test_parse_unstructured_chunks(self, monkeypatch):
+        calls = []
+        def reference_parse(reference_list):
+            calls.append(reference_list)
+            if "bad" in reference_list[0]:
+                raise ValueError("bad chunk")
+            return [
+                {"index": len(reference_list) - i, "title": reference}
+                for i, reference in enumerate(reversed(reference_list))
+            ]
+        monkeypatch.setattr(ArticleAPI, "_reference_cache", LRUCache(max_entries=2))
+        monkeypatch.setattr("src.article_api.article_api.REFERENCE_CHUNK_SIZE", 2)
+        monkeypatch.setattr("src.llm_api.open.OpenAPI.reference_parse", reference_parse)
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "openai"})
+
+        unstructured = ["ref a", "ref b", "bad c", "ref d", "Ref A."]
+        result = ArticleAPI.parse_unstructured(unstructured)
+        assert len(calls) == 2
+        assert [x and x["title"] for x in result] == ["ref a", "ref b", None, None, "ref a"]
+        assert "index" not in result[0]
+
+        result = ArticleAPI.parse_unstructured(["ref b"])
+        assert len(calls) == 2
+        assert result[0]["title"] == "ref b"
+
+        ArticleAPI.parse_unstructured(["ref e"])
+        assert len(ArticleAPI._reference_cache) == 2
+        assert ArticleAPI._reference_cache.get("ref a") is None
+
+    def test_known_title(self, monkeypatch):
+        monkeypatch.setattr(ArticleAPI, "_known_titles", TitleIndex())
+        monkeypatch.setattr(ArticleAPI, "_known_years", {})
+        ArticleAPI.add_known_title("localkey", "Precipitation downscaling with spatiotemporal video diffusion", 2023)
+
+        assert ArticleAPI._resolve_sbkey({"title": "Precipitation Downscaling with Spatiotemporal Video Diffusion", "year": 2023}) == "localkey"
+        assert ArticleAPI._find_known_sbkey({"title": "Precipitation downscaling with spatiotemporal video diffusion", "year": 2020}) is None
+        assert ArticleAPI._find_known_sbkey({"title": "Precipitation downscaling with spatiotemporal video diffusion"}) is None
+        ArticleAPI.add_known_title("undated", "Turbulent drag over riblets")
+        assert ArticleAPI._find_known_sbkey({"title": "Turbulent drag over riblets", "year": 2023}) is None
+
+        monkeypatch.setattr(ArticleAPI, "_dict_to_sbkey", classmethod(lambda cls, data: "resolved"))
+        assert ArticleAPI._resolve_sbkey({"title": "Precipitation downscaling with spatiotemporal video diffusion", "year": 2023, "DOI": "10.1/x"}) == "resolved"
+
+    def test_get_data_identifiers_first(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("title search should not run")
+        monkeypatch.setattr(ArxivQuery, "with_title", fail)
+        monkeypatch.setattr(CrossrefQuery, "with_title", fail)
+        monkeypatch.setattr(AdsQuery, "with_title", fail)
+        monkeypatch.setattr(ArxivQuery, "with_arxiv", lambda arxiv_id: {
+            "title": "Test Title", "first_author": "Test, Author", "year": 2020,
+            "arxiv_id": arxiv_id + "v2", "doi": None, "summary": "summary"})
+        monkeypatch.setattr(CrossrefQuery, "with_doi", lambda doi: {
+            "title": "Test title.", "first_author": "Test, Author", "year": 2021,
+            "doi": doi, "abstract": None, "reference": []})
+        monkeypatch.setattr(AdsQuery, "with_bibcode", lambda bibcode: {
+            "title": "Test Title", "first_author": "Test, Author", "year": "2021",
+            "bibcode": bibcode, "doi": None, "abstract": None, "reference": []})
+
+        result = ArticleAPI.get_data("Test Title", ["Test, Author"], {
+            "doi": "10.0000/test", "arxiv_id": "arXiv:2001.00001", "bibcode": "2021Test..001T"})
+        assert result["arxiv_id"] == "2001.00001v2"
+        assert result["crossref_doi"] == "10.0000/test"
+        assert result["ads_bibcode"] == "2021Test..001T"
+        assert result["year"] == 2021
@@ -0,0 +1,110 @@
+
+import io
+import json
+import threading
+import urllib.request
+import urllib.error
+
+import pytest
+
+from src.cli.server import create_server
+
+class TestServer:
+    class FakeKnowledgeBase:
+        def __len__(self):
+            return 2
+        def search(self, query, n=5):
+            return [{"key": "a", "title": query, "file_name": "a.md", "distance": 0.1}][:n]
+        def qna(self, query):
+            return {"answer": f"answer to {query}", "keys": ["a"]}
+
+    @pytest.fixture
+    def url(self):
+        server = create_server(self.FakeKnowledgeBase(), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_port}"
+        server.shutdown()
+        server.server_close()
+
+    @staticmethod
+    def request(url, data=None):
+        body = json.dumps(data).encode() if data is not None else None
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, data=body)) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_health(self, url):
+        assert self.request(f"{url}/health") == (200, {"status": "ok", "entries": 2})
+
+    def test_search(self, url):
+        status, result = self.request(f"{url}/search?q=galaxy&n=1")
+        assert status == 200
+        assert result["results"][0]["title"] == "galaxy"
+
+        status, result = self.request(f"{url}/search", {"query": "galaxy"})
+        assert result["results"][0]["key"] == "a"
+
+        assert self.request(f"{url}/search?q=galaxy&n=many")[0] == 400
+        assert self.request(f"{url}/search", {"query": "galaxy", "n": [1]})[0] == 400
+        assert self.request(f"{url}/search", {"query": "galaxy", "n": 0})[0] == 400
+
+    def test_qna(self, url):
+        assert self.request(f"{url}/qna", {"query": "why"}) == (200, {"answer": "answer to why", "keys": ["a"]})
+        assert self.request(f"{url}/qna", {})[0] == 400
+        for payload in ([1], "why", 3):
+            assert self.request(f"{url}/qna", payload)[0] == 400
+            assert self.request(f"{url}/search", payload)[0] == 400
+        assert self.request(f"{url}/unknown")[0] == 404
+
+class TestBatch:
+    class FakeKnowledgeBase:
+        def close(self):
+            pass
+        def qna(self, query):
+            if query == "fail":
+                raise RuntimeError("generation failed")
+            return {"answer": f"answer to {query}", "keys": ["a"], "timings": {"generation_ms": 1.0}}
+
+    @pytest.fixture
+    def lines(self):
+        return [
+            '{"id": "q1", "question": "why"}',
+            '"how"',
+            '',
+            '{"question": "why"',
+            '[1, 2]',
+            '{"id": "q5"}',
+            '{"question": "fail"}',
+        ]
+
+    def test_read_questions(self, lines):
+        from src.cli.batch import read_questions
+        questions = read_questions(io.StringIO("\n".join(lines)))
+        assert [q["id"] for q in questions] == ["q1", 1, 3, 4, "q5", 6]
+        assert [q.get("error") is not None for q in questions] == [False, False, True, True, True, False]
+        assert questions[1]["question"] == "how"
+
+    def test_run_batch(self, lines, tmp_path):
+        from src.cli.batch import run_batch
+        input_path, output_path = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+        input_path.write_text("\n".join(lines))
+        run_batch(self.FakeKnowledgeBase, str(input_path), str(output_path), workers=2)
+
+        results = [json.loads(line) for line in output_path.read_text().splitlines()]
+        assert [r["id"] for r in results] == ["q1", 1, 3, 4, "q5", 6]
+        assert [r.get("answer") for r in results[:2]] == ["answer to why", "answer to how"]
+        assert results[0]["timings"]["generation_ms"] == 1.0
+        assert "Invalid JSON" in results[2]["error"]
+        assert results[4]["error"] == "Missing question"
+        assert results[5]["error"] == "generation failed"
+
+    @pytest.mark.parametrize("workers", ["0", "-2", "many"])
+    def test_invalid_workers(self, workers, capsys):
+        from src.cli.parser import setup_parser
+        with pytest.raises(SystemExit) as e:
+            setup_parser().parse_args(["--batch", "-", "--workers", workers])
+        assert e.value.code == 2
+        assert "--workers" in capsys.readouterr().err
@@ -1,9 +1,12 @@
 
 import os
 import pytest
+import pandas
+import numpy as np
 
 from src.knowledge.knowledge import Knowledge
 from src.knowledge.article import Article
+from src.knowledge.watcher import KnowledgeWatcher, PollingSource
 
 class TestKnowledge:
     @pytest.fixture
@@ -48,6 +51,14 @@ class TestKnowledge:
         assert result["created"] == created
         assert result["tags"] is not None
 
+    def test_debug_note_sections(self, tmp_path):
+        from src.knowledge.debug_note import DebugNote
+        (tmp_path / "debug.md").write_text("---\nID: debug\n---\n# Issue\nKeyError: 'x'\n# Solution\nAdd x\n")
+        note = DebugNote("debug.md", {"key": "debug", "hash": "h"}, note_directory=str(tmp_path))
+        assert note._body is None
+        assert note.issue_body == "KeyError: 'x'"
+        assert note.debug_body is None
+
 class TestArticle:
     @pytest.fixture
     def file_name(self):
@@ -129,4 +140,408 @@ class TestArticle:
         assert result["category"] is not None
         assert result["tags"][0] == "Paper"
 
-        #TODO adding category, tags
\ No newline at end of file
+        #TODO adding category, tags
+
+class TestKnowledgeWatcher:
+    class FakeKnowledgeBase:
+        def __init__(self, note_directory):
+            self.note_directory = note_directory
+            self.processed = []
+            self.removed = []
+            self.written = set()
+        def is_unchanged(self, file):
+            return file in self.written
+        def process_file(self, file):
+            self.processed.append(file)
+        def remove_file(self, file):
+            self.removed.append(file)
+
+    def test_debounced_changes(self, tmp_path):
+        kb = self.FakeKnowledgeBase(str(tmp_path))
+        (tmp_path / "deleted.md").write_text("deleted")
+        watcher = KnowledgeWatcher(kb, debounce=0.2, source=PollingSource(str(tmp_path), interval=0.05))
+
+        for i in range(3):
+            (tmp_path / "note.md").write_text(f"edit {i}")
+            (tmp_path / ".note.md.tmp").write_text("temporary")
+            watcher.step(0.05)
+        (tmp_path / "deleted.md").unlink()
+        assert kb.processed == []
+
+        for _ in range(10):
+            watcher.step(0.05)
+        assert kb.processed == ["note.md"]
+        assert kb.removed == ["deleted.md"]
+
+    def test_skips_own_writes(self, tmp_path):
+        kb = self.FakeKnowledgeBase(str(tmp_path))
+        watcher = KnowledgeWatcher(kb, debounce=0, source=PollingSource(str(tmp_path), interval=0.01))
+        kb.written.add("own.md")
+        (tmp_path / "own.md").write_text("written by the knowledge base")
+        (tmp_path / "user.md").write_text("edited by the user")
+        watcher.step(0.01)
+        assert kb.processed == ["user.md"]
+
+    def test_knowledge_base_is_unchanged(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.knowledge import Knowledge
+        from src.utils.file import FileUtils
+        (tmp_path / "a.md").write_text("# a\nFirst version.\n")
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline"})
+        kb = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        hashed = []
+        calculate_hash = FileUtils.calculate_hash
+        monkeypatch.setattr(FileUtils, "calculate_hash", lambda path: hashed.append(path) or calculate_hash(path))
+        assert kb.is_unchanged("a.md")
+        KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        assert hashed == []
+
+        (tmp_path / "a.md").write_text("# a\nSecond version.\n")
+        assert not kb.is_unchanged("a.md")
+        assert len(hashed) == 1
+        assert not kb.is_unchanged("missing.md")
+
+class TestKnowledgeBase:
+    def test_vector_search_nearest(self):
+        from src.knowledge.base import KnowledgeBase
+        kb = object.__new__(KnowledgeBase)
+        kb.db = pandas.DataFrame({
+            "key": ["far", "near", "missing", "middle"],
+            "embedding_body": [np.array([10.0, 0.0]), np.array([1.0, 0.0]), None, np.array([3.0, 0.0])],
+        })
+        result = kb.vector_search("embedding_body", np.array([0.0, 0.0]), n=2)
+        assert result["key"].tolist() == ["near", "middle"]
+        assert result["distance"].tolist() == [1.0, 3.0]
+        assert "distance" not in kb.db
+
+    def test_mixed_embedding_dimensions(self):
+        from src.knowledge.base import KnowledgeBase
+        kb = object.__new__(KnowledgeBase)
+        kb.db = pandas.DataFrame({
+            "key": ["offline", "openai"],
+            "embedding_body": [np.array([1.0, 0.0]), np.array([1.0, 0.0, 0.0])],
+            "embedding_title": [np.array([0.0, 1.0]), np.array([0.0, 1.0, 0.0])],
+        })
+        result = kb.vector_search("embedding_body", np.array([1.0, 0.0, 0.0]), n=2)
+        assert result["key"].tolist() == ["openai", "offline"]
+        assert result["distance"].tolist() == [0.0, float("inf")]
+        ranked = KnowledgeBase._rerank_mmr(kb.db, [1.0, 0.0], n=2, diversity_lambda=1.0)
+        assert ranked["key"].tolist() == ["offline", "openai"]
+
+    def test_rerank_mmr(self):
+        from src.knowledge.base import KnowledgeBase
+        related = pandas.DataFrame({
+            "key": ["v1", "v2", "other", "none"],
+            "embedding_body": [np.array([1.0, 0.0]), np.array([0.99, 0.1]), np.array([0.6, 0.8]), None],
+        })
+        query = np.array([1.0, 0.0])
+        relevant_first = KnowledgeBase._rerank_mmr(related, query, n=3, diversity_lambda=1.0)
+        assert relevant_first["key"].tolist() == ["v1", "v2", "other"]
+        diverse = KnowledgeBase._rerank_mmr(related.head(3), query, n=3, diversity_lambda=0.3)
+        assert diverse["key"].tolist() == ["v1", "other", "v2"]
+        ranked = KnowledgeBase._rerank_mmr(related, query, relevance=[0.1, 0.2, 0.3, 1.0], n=2, diversity_lambda=1.0)
+        assert ranked["key"].tolist() == ["none", "other"]
+
+    def test_note_cache(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.knowledge import Knowledge
+        for name in ["a", "b", "c"]:
+            (tmp_path / f"{name}.md").write_text(f"# {name}\nBody of {name}.\n")
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline", "note_cache_entries": 2})
+        kb = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        assert len(kb.notes) == 2
+        assert kb.notes.evictions == 1
+
+        evicted = next(key for key in ["a", "b", "c"] if key not in kb.notes)
+        note = kb._load_note(evicted, f"{evicted}.md")
+        assert note._body is None
+        assert note.body == f"# {evicted}\nBody of {evicted}.\n"
+        assert kb._load_note(evicted, f"{evicted}.md") is note
+        assert kb.notes.stats()["hits"] == 1
+
+    def test_note_cache_bytes(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.knowledge import Knowledge
+        for i in range(5):
+            (tmp_path / f"n{i}.md").write_text(f"# n{i}\n" + "word " * 20000)
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline", "note_cache_mb": 0.3})
+        kb = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        kb.notes.clear()
+
+        for i in range(5):
+            kb._load_note(f"n{i}", f"n{i}.md")
+        assert len(kb.notes) == 5
+        for i in range(5):
+            kb._context_entry(kb.db[kb.db["key"] == f"n{i}"].iloc[0])
+        held = sum(KnowledgeBase._note_size(note) for note, _ in kb.notes._data.values())
+        assert kb.notes.bytes == held <= kb.notes.max_bytes
+        assert len(kb.notes) < 5
+
+    def test_update_entry_swaps_db(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.knowledge import Knowledge
+        (tmp_path / "a.md").write_text("# a\nFirst version.\n")
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline"})
+        kb = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        snapshot = kb.db
+        hash = snapshot["hash"].iloc[0]
+
+        (tmp_path / "a.md").write_text("# a\nSecond version.\n")
+        kb.process_file("a.md")
+        assert snapshot["hash"].iloc[0] == hash
+        assert kb.db is not snapshot
+        assert kb.db["hash"].iloc[0] != hash
+
+    def test_load_db_skips_bad_rows(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.knowledge import Knowledge
+        (tmp_path / "a.md").write_text("# a\nFirst note.\n")
+        (tmp_path / "b.md").write_text("# b\nSecond note.\n")
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline"})
+        kb = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        kb.db["ref"] = kb.db["key"].map({"a": [{"malformed": "ref"}], "b": ["x"]})
+        kb.save_db()
+
+        monkeypatch.setattr(KnowledgeBase, "_process_files", lambda self: None)
+        reloaded = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        assert sorted(reloaded.db["key"]) == ["a", "b"]
+        assert reloaded.graph.cited_by("x") == ["b"]
+
+    def test_key_change(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.knowledge import Knowledge
+        (tmp_path / "a.md").write_text("# a\nOld text about riblets.\n")
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline"})
+        kb = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        kb.graph.set_references("a", ["x"])
+
+        (tmp_path / "a.md").write_text("# a\nNew text about turbulence.\n")
+        generate_entry = Knowledge._generate_entry
+        def rename(note):
+            generate_entry(note)
+            note.key = "renamed"
+        monkeypatch.setattr(Knowledge, "_generate_entry", rename)
+        kb.process_file("a.md")
+        assert kb.db["key"].tolist() == ["renamed"]
+        assert "a" not in kb.lexical
+        assert [key for key, _ in kb.lexical.search("riblets turbulence")] == ["renamed"]
+        assert kb.graph.cited_by("x") == []
+
+class TestFederatedKnowledgeBase:
+    @pytest.fixture
+    def federated(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.federated import FederatedKnowledgeBase
+        papers, incidents = tmp_path / "papers", tmp_path / "incidents"
+        papers.mkdir()
+        incidents.mkdir()
+        (papers / "search.md").write_text("# Vector search\nVector search finds nearest embeddings.\n")
+        (papers / "drag.md").write_text("# Drag\nSuperhydrophobic surfaces reduce turbulent drag.\n")
+        (incidents / "outage.md").write_text("# Outage\nThe vector search index ran out of memory.\n")
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline", "knowledgebases": [
+            {"name": "papers", "path": str(papers), "type": "default"},
+            {"path": str(incidents), "type": "default"},
+        ]})
+        return FederatedKnowledgeBase()
+
+    def test_shards(self, federated, tmp_path):
+        assert set(federated.shards) == {"papers", "incidents"}
+        assert len(federated) == 3
+        assert os.path.isfile(tmp_path / "incidents" / ".database" / "db.h5")
+
+    def test_duplicate_names(self, tmp_path):
+        from src.knowledge.federated import FederatedKnowledgeBase
+        with pytest.raises(ValueError, match="notes"):
+            FederatedKnowledgeBase([
+                {"name": "notes", "path": str(tmp_path / "a" / "notes"), "type": "default"},
+                {"name": "notes", "path": str(tmp_path / "b" / "notes"), "type": "default"},
+            ])
+
+    def test_search(self, federated):
+        result = federated.search("vector search", n=2)
+        assert [(r["shard"], r["key"]) for r in result] == [("papers", "search"), ("incidents", "outage")]
+        assert result[0]["score"] >= result[1]["score"]
+
+    def test_qna(self, federated, tmp_path):
+        result = federated.qna("vector search")
+        assert result["keys"][:2] == ["search", "outage"]
+        assert "Vector search finds nearest embeddings." in result["answer"]
+
+        assert federated.qna("vector search")["timings"]["generation_ms"] == 0.0
+        assert federated.answers.stats()["hits"] == 1
+        assert len(federated.shards["papers"].answers) == 0
+
+        (tmp_path / "incidents" / "outage.md").write_text("# Outage\nThe vector search index was rebuilt.\n")
+        federated.shards["incidents"].process_file("outage.md")
+        assert "rebuilt" in federated.qna("vector search")["answer"]
+        federated.close()
+        assert os.path.isfile(federated.answers_path)
+
+class TestCitationGraph:
+    @pytest.fixture
+    def graph(self):
+        from src.knowledge.graph import CitationGraph
+        graph = CitationGraph()
+        graph.set_references("a", ["x", "y", "z"])
+        graph.set_references("b", ["x", "y", "b"])
+        graph.set_references("x", ["z"])
+        return graph
+
+    def test_cited_by(self, graph):
+        assert graph.cited_by("x") == ["a", "b"]
+        assert graph.cited_by("z") == ["a", "x"]
+        assert graph.references("b") == ["x", "y"]
+
+    def test_co_citation(self, graph):
+        assert graph.co_citation("x", "y") == 2
+        assert graph.co_citation("x", "z") == 1
+        assert graph.co_cited("x") == [("y", 2), ("z", 1)]
+
+    def test_update(self, graph):
+        graph.set_references("a", ["y"])
+        assert graph.cited_by("x") == ["b"]
+        assert graph.co_citation("x", "y") == 1
+        assert graph.co_citation("x", "z") == 0
+
+        graph.remove("b")
+        assert graph.cited_by("x") == []
+        assert graph.cited_by("y") == ["a"]
+        assert graph.co_cited("x") == []
+        assert "b" not in graph
+
+    def test_neighbours(self, graph):
+        assert graph.neighbours("a") == {"x": 1, "y": 1, "z": 1}
+        assert graph.neighbours("b", k=2) == {"x": 1, "y": 1, "a": 2, "z": 2}
+        assert graph.neighbours("z", direction="cited_by") == {"a": 1, "x": 1}
+
+    def test_knowledge_base_cited_by(self):
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.graph import CitationGraph
+        kb = object.__new__(KnowledgeBase)
+        kb.graph = CitationGraph()
+        kb.db = pandas.DataFrame({"key": ["a", "b"], "ref": [["b"], []], "cited_by": [[], []]})
+        for _, row in kb.db.iterrows():
+            kb._add_references(row)
+        assert kb.db["cited_by"].tolist() == [[], ["a"]]
+
+        kb.append_db_entry({"key": "c", "ref": ["a", "b"], "cited_by": []})
+        assert kb.db["cited_by"].tolist() == [["c"], ["a", "c"], []]
+        kb._add_references({"key": "c", "ref": ["b"]})
+        assert kb.db["cited_by"].tolist() == [[], ["a", "c"], []]
+
+class TestBM25Index:
+    @pytest.fixture
+    def index(self):
+        from src.knowledge.bm25 import BM25Index
+        index = BM25Index()
+        index.add("timeout", "Requests failed with ERR_CONNECTION_REFUSED after the proxy restart", "h1")
+        index.add("memory", "The worker ran out of memory while building the index", "h2")
+        index.add("drag", "Superhydrophobic surfaces reduce turbulent drag", "h3")
+        return index
+
+    def test_exact_identifier(self, index):
+        assert index.tokenize("See numpy.linalg") == ["see", "numpy.linalg", "numpy", "linalg"]
+        assert index.search("ERR_CONNECTION_REFUSED")[0][0] == "timeout"
+        assert [key for key, _ in index.search("connection refused")] == ["timeout"]
+        assert index.search("unrelated words") == []
+
+    def test_update(self, index):
+        index.add("timeout", "Resolved by raising the pool size", "h4")
+        assert index.search("ERR_CONNECTION_REFUSED") == []
+        assert index.is_current("timeout", "h4")
+        index.remove("memory")
+        assert "memory" not in index
+        assert index.search("memory") == []
+        assert index.total_length == sum(index.lengths.values())
+
+    def test_persistence(self, index, tmp_path):
+        from src.knowledge.bm25 import BM25Index
+        path = str(tmp_path / "bm25.pkl")
+        index.save(path)
+        loaded = BM25Index.load(path)
+        assert loaded.search("turbulent drag") == index.search("turbulent drag")
+        assert loaded.is_current("drag", "h3")
+        assert len(BM25Index.load(str(tmp_path / "missing.pkl"))) == 0
+
+    def test_knowledge_base_hybrid(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.knowledge import Knowledge
+        (tmp_path / "proxy.md").write_text("# Proxy\nClients saw E4012 when the proxy dropped idle sockets.\n")
+        (tmp_path / "search.md").write_text("# Search\nVector search finds nearest embeddings.\n")
+        (tmp_path / "cache.md").write_text("# Cache\nThe cache evicts least recently used entries.\n")
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline"})
+        kb = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        assert kb.search("what does E4012 mean", n=3)[0]["key"] == "proxy"
+        assert os.path.isfile(tmp_path / ".database" / "bm25.pkl")
+
+        (tmp_path / "proxy.md").unlink()
+        kb.remove_file("proxy.md")
+        reloaded = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        assert len(reloaded.lexical) == 2
+        assert "proxy" not in reloaded.lexical
+
+class TestAnswerCache:
+    @pytest.fixture
+    def cache(self):
+        from src.knowledge.answer_cache import AnswerCache
+        cache = AnswerCache(threshold=0.9)
+        cache.add("what is drag", [1.0, 0.0], {"answer": "friction", "keys": ["a", "b"]}, {"a": "h1", "b": "h2"})
+        return cache
+
+    def test_similar_question(self, cache):
+        assert cache.get([0.99, 0.05])["answer"] == "friction"
+        assert cache.get([0.0, 1.0]) is None
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_invalidate(self, cache):
+        cache.invalidate("a", "h1")
+        assert len(cache) == 1
+        cache.invalidate("b", "changed")
+        assert len(cache) == 0
+        assert cache.get([1.0, 0.0]) is None
+
+    def test_scope(self, cache):
+        cache.add("what is drag", [1.0, 0.0], {"answer": "federated"}, {"papers/a": "h1"}, scope=("incidents", "papers"))
+        assert cache.get([1.0, 0.0])["answer"] == "friction"
+        assert cache.get([1.0, 0.0], scope=("incidents", "papers"))["answer"] == "federated"
+        assert cache.get([1.0, 0.0], scope=("papers",)) is None
+
+        assert cache.get([1.0, 0.0], scope=("incidents", "papers"), current={"papers/a": "changed"}.get) is None
+        assert len(cache) == 1
+
+    def test_persistence(self, cache, tmp_path):
+        from src.knowledge.answer_cache import AnswerCache
+        path = str(tmp_path / "answers.pkl")
+        cache.save(path)
+        assert AnswerCache.load(path, threshold=0.9).get([1.0, 0.0])["keys"] == ["a", "b"]
+
+    def test_knowledge_base_qna(self, tmp_path, monkeypatch):
+        from src.utils.config import Config
+        from src.knowledge.base import KnowledgeBase
+        from src.knowledge.knowledge import Knowledge
+        (tmp_path / "drag.md").write_text("# Drag\nSuperhydrophobic surfaces reduce turbulent drag.\n")
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline", "answer_cache_threshold": 0.99})
+        kb = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        first = kb.qna("what reduces turbulent drag")
+        assert first["keys"] == ["drag"]
+        assert kb.answers.stats()["misses"] == 1
+        assert not os.path.exists(kb.answers_path)
+        kb.close()
+
+        reloaded = KnowledgeBase(Knowledge, note_directory=str(tmp_path))
+        cached = reloaded.qna("what reduces turbulent drag")
+        assert cached["answer"] == first["answer"]
+        assert cached["timings"]["generation_ms"] == 0.0
+        assert reloaded.answers.stats()["hits"] == 1
+
+        (tmp_path / "drag.md").write_text("# Drag\nRiblets also reduce turbulent drag.\n")
+        reloaded.process_file("drag.md")
+        assert len(reloaded.answers) == 0
+        assert "Riblets" in reloaded.qna("what reduces turbulent drag")["answer"]
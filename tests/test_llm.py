@@ -2,6 +2,9 @@ import pytest
 import numpy as np
 
 from src.llm_api.open import OpenAPI
+from src.llm_api.offline import OfflineAPI
+from src.llm_api.factory import LLMFactory
+from src.utils.config import Config
 
 class TestOpenAPI:
     @pytest.fixture
@@ -65,4 +68,53 @@ KeyError: Key not found in dictionary
         result = OpenAPI.analyze_error(test_error_log)
         assert result["error_message"] not in ["", None]
         assert result["location"] not in ["", None]
-        assert result["traceback"] not in ["", None]
\ No newline at end of file
+        assert result["traceback"] not in ["", None]
+
+
+class TestOfflineAPI:
+    def test_factory(self, monkeypatch):
+        monkeypatch.setattr(Config, "_config", {"llm_provider": "offline"})
+        assert LLMFactory.create() is OfflineAPI
+        assert LLMFactory.create("openai") is OpenAPI
+        with pytest.raises(ValueError):
+            LLMFactory.create("unknown")
+
+    def test_embedding(self):
+        result = OfflineAPI.embedding(["vector search with embeddings", "Vector search, with embeddings!", "superhydrophobic surfaces"])
+        assert np.allclose(result[0], result[1])
+        assert np.isclose(np.linalg.norm(result[0]), 1)
+        assert np.dot(result[0], result[1]) > np.dot(result[0], result[2])
+
+    def test_keywords(self):
+        result = OfflineAPI.document_keyword_extraction("Drag reduction in turbulent flow. Turbulent drag is reduced by superhydrophobic surfaces.")
+        assert result[:2] == ["drag", "turbulent"]
+        assert OfflineAPI.query_keyword_generation("What is vector search?") == ["vector", "search", "vector_search"]
+
+    def test_reference_parse(self):
+        result = OfflineAPI.reference_parse([
+            "Fukagata, K., Kasagi, N., Koumoutsakos, P. (2006). A theoretical prediction of friction drag reduction in turbulent flow by superhydrophobic surfaces. Physics of Fluids, 18(5)",
+            "no year here",
+        ])
+        assert len(result) == 1
+        assert result[0]["index"] == 1
+        assert result[0]["first_author"] == "Fukagata"
+        assert result[0]["year"] == 2006
+        assert result[0]["title"].startswith("A theoretical prediction of friction drag reduction")
+
+    def test_qna(self):
+        example = "Related\n# Vector Search\nVector search finds nearest embeddings. It is fast.\n\n# Cooking\nBoil the pasta.\n\n"
+        result = OfflineAPI.qna("What is vector search?", example)
+        assert result["references"] == ["Vector Search"]
+        assert result["answer"].startswith("Vector search finds nearest embeddings. [1]")
+
+    def test_analyze_error(self):
+        error_log = """
+Traceback (most recent call last):
+  File "module_1.py", line 15, in function_a
+  File "module_3.py", line 19, in function_c
+KeyError: Key not found in dictionary
+"""
+        result = OfflineAPI.analyze_error(error_log)
+        assert result["error_message"] == ["KeyError: Key not found in dictionary"]
+        assert result["location"] == ['File "module_3.py", line 19, in function_c']
+        assert result["traceback"][0].startswith("Traceback")
@@ -1,8 +1,17 @@
+import io
+import json
+import logging
+import logging.handlers
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 
-from src.utils.md import MarkdownUtils
+from src.utils.md import MarkdownUtils, MarkdownDocument
 from src.utils.text import TextUtils
 from src.utils.file import FileUtils
+from src.utils.title_index import TitleIndex
+from src.utils.lru_cache import LRUCache
+from src.utils.profile import Profiler
+from src.utils.log import LogUtils, JsonFormatter, OPERATION_LOGGER
 
 class TestMarkdownUtils:
     @pytest.fixture
@@ -43,17 +52,101 @@ class TestMarkdownUtils:
         assert metadata["test_entry"] == "The quick brown fox jumps over the lazy dog"
         assert len(body) != 0
 
+    @pytest.mark.parametrize("text, metadata, body", [
+        ("\n---\nauthor: Test, Author\n---\n\nThis is a test", {"author": ["Test, Author"]}, "\nThis is a test"),
+        ("\nNo frontmatter\n---\n", {}, "No frontmatter\n---\n"),
+        ("---\nunclosed: true\n", {}, "---\nunclosed: true\n"),
+    ])
+    def test_read_frontmatter(self, text, metadata, body):
+        file = io.BytesIO(text.encode())
+        result, offset = MarkdownUtils.read_frontmatter(file)
+        assert result == metadata
+        assert MarkdownUtils.read_body(file, offset) == body
+        assert (result, body) == MarkdownUtils.extract_yaml(text.splitlines(keepends=True))
+
     def test_extract_bibtex(self, bibtex_test_data, bibtex_dict):
         result = MarkdownUtils.extract_bibtex(bibtex_test_data)
         assert result == bibtex_dict
 
+    @pytest.mark.parametrize("bibtex, expected", [
+        (
+            """@ARTICLE{2023arXiv231206071S,
+       author = {{Srivastava}, Prakhar and {Yang}, Ruihan},
+        title = "{Precipitation Downscaling with Spatiotemporal Video Diffusion}",
+         year = 2023,
+        month = dec,
+          doi = {10.48550/arXiv.2312.06071},
+       eprint = {2312.06071},
+       adsurl = {https://ui.adsabs.harvard.edu/abs/2023arXiv231206071S},
+}""",
+            {
+                "bibtex_key": "2023arXiv231206071S",
+                "title": "{Precipitation Downscaling with Spatiotemporal Video Diffusion}",
+                "author": ["{Srivastava}, Prakhar", "{Yang}, Ruihan"],
+                "year": 2023,
+                "doi": "10.48550/arXiv.2312.06071",
+                "eprint": "2312.06071",
+                "bibcode": "2023arXiv231206071S",
+            }
+        ),
+        (
+            """@string{name = "Name for Testing"}
+@article{test2099article, title = name, author = {Test, Author1}, year = {2099}}""",
+            {
+                "bibtex_key": "test2099article",
+                "title": "Name for Testing",
+                "author": ["Test, Author1"],
+                "year": 2099,
+            }
+        ),
+        ("@article{test2099article, title = {Missing author}, year = {2099}}", {}),
+    ])
+    def test_extract_bibtex_fields(self, bibtex, expected):
+        result = MarkdownUtils.extract_bibtex(f"```BibTeX\n{bibtex}\n```")
+        assert result == expected
+
     #TODO
     def test_extract_code_blocks(self):
         pass
     
-    #TODO
-    def test_extract_section(self):
-        pass
+    @pytest.fixture
+    def section_test_data(self):
+        return "\n".join([
+            "# Title",
+            "intro",
+            "## Issue",
+            "issue text",
+            "### Detail",
+            "```",
+            "# not a heading",
+            "```",
+            "## Solution",
+            "solution text",
+            "# Next",
+        ])
+
+    @pytest.mark.parametrize("section_name, expected, start, end", [
+        ("Issue", "issue text\n### Detail\n```\n# not a heading\n```", 2, 8),
+        ("solution", "solution text", 8, 10),
+        ("not a heading", None, None, None),
+    ])
+    def test_extract_section(self, section_test_data, section_name, expected, start, end):
+        assert MarkdownUtils.extract_section(section_test_data, section_name) == (expected, start, end)
+
+    def test_markdown_document(self, section_test_data):
+        document = MarkdownDocument(section_test_data)
+        issue = document.section("Issue")
+        detail = document.section("Detail")
+        assert detail.parent is issue
+        assert [x.name for x in document.root.children] == ["Title", "Next"]
+
+        assert document.content(issue, exclude=[detail]) == "issue text"
+        assert document.remove([issue, document.section("Next")]) == "# Title\nintro\n## Solution\nsolution text"
+        assert document.replace(detail, "new") == section_test_data.replace("```\n# not a heading\n```", "new")
+
+    def test_create_others_section(self):
+        text = MarkdownUtils.create_others_section("other text\n", {"Bibtex": "bibtex\n"})
+        assert text == "## Others\nother text\n### Bibtex\nbibtex\n"
 
     def test_create_md_text(self, bibtex_dict):
         md_text = MarkdownUtils.create_md_text(bibtex_dict, "This is a test")
@@ -102,14 +195,204 @@ class TestTextUtils:
     def test_key_generation(self, title, author, year, expected):
         assert TextUtils.generate_sbkey(title, author, year) == expected
 
+    @pytest.mark.parametrize("text, expected", [
+        (
+            "See https://doi.org/10.1063/1.2205307. and arXiv: 2312.06071v2",
+            {"doi": "10.1063/1.2205307", "arxiv_id": "2312.06071", "bibcode": None}
+        ),
+        (
+            "https://ui.adsabs.harvard.edu/abs/2023arXiv231206071S/abstract",
+            {"doi": None, "arxiv_id": None, "bibcode": "2023arXiv231206071S"}
+        ),
+    ])
+    def test_extract_identifiers(self, text, expected):
+        assert TextUtils.extract_identifiers(text) == expected
+
+    @pytest.mark.parametrize("value, expected", [
+        ("2023arXiv231206071S", "2312.06071"),
+        ("10.48550/arXiv.2011.11911", "2011.11911"),
+        ("hep-th/9901001v2", "hep-th/9901001"),
+        ("10.1063/1.2205307", None),
+    ])
+    def test_get_arxiv_id(self, value, expected):
+        assert TextUtils.get_arxiv_id(value) == expected
+
     #TODO
     def test_trim_lines(self):
         pass
 
 
+class TestTitleIndex:
+    @pytest.fixture
+    def titles(self):
+        return {
+            "fukaga2006atheorptodrritfbss": "A theoretical prediction of friction drag reduction in turbulent flow by superhydrophobic surfaces",
+            "srivas2023precipdwsvd.........": "Precipitation downscaling with spatiotemporal video diffusion",
+            "morimo2021generatonnfffe.......": "Generalization techniques of neural networks for fluid flow estimation",
+        }
+
+    @pytest.fixture
+    def index(self, titles):
+        index = TitleIndex(threshold=0.8)
+        for key, title in titles.items():
+            index.add(key, title)
+        return index
+
+    @pytest.mark.parametrize("query, expected", [
+        ("Precipitation Downscaling with Spatiotemporal Video Diffusion.", "srivas2023precipdwsvd........."),
+        ("Generalisation techniques of neural networks for fluid flow estimation", "morimo2021generatonnfffe......."),
+        ("Neural networks for precipitation", None),
+    ])
+    def test_best(self, index, query, expected):
+        assert index.best(query) == expected
+
+    def test_search_matches_pairwise(self, index, titles):
+        query = "A theoretical prediction of friction drag reduction"
+        for threshold in [0.3, 0.5, 0.7]:
+            expected = {
+                key for key, title in titles.items()
+                if TextUtils.dice(TextUtils.ngrams(query), TextUtils.ngrams(title)) >= threshold
+            }
+            assert {key for key, _ in index.search(query, threshold)} == expected
+
+    def test_remove(self, index):
+        index.remove("srivas2023precipdwsvd.........")
+        assert len(index) == 2
+        assert index.best("Precipitation downscaling with spatiotemporal video diffusion") is None
+
+class TestLRUCache:
+    def test_max_entries(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert "b" not in cache
+        assert cache.get("b") is None
+        assert cache.stats() == {"entries": 2, "bytes": 0, "hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5}
+
+    def test_max_bytes(self):
+        cache = LRUCache(max_bytes=10, sizeof=len)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.put("a", "aaaaaa")
+        assert cache.bytes == 10
+        cache.put("c", "c" * 20)
+        assert list(cache._data) == ["c"]
+        assert cache.evictions == 2
+        assert cache.pop("c") == "c" * 20
+        assert cache.bytes == 0
+
+    def test_resize(self):
+        cache = LRUCache(max_bytes=10, sizeof=len)
+        values = {key: [] for key in "abc"}
+        for key, value in values.items():
+            cache.put(key, value)
+        assert cache.bytes == 0
+        for key, value in values.items():
+            value.extend(range(4))
+            cache.resize(key)
+        assert list(cache._data) == ["b", "c"]
+        assert cache.bytes == 8
+
 class TestFileUtils:
     @pytest.mark.parametrize("file_path, expected", [
         ("tests/data/article.md", "231093aa25d7131244b1f70d4e1d7acfb79ceed6551242b374dfe17fd5ce6943d833ef405a10e262a69157ca40be5a3d59ab006e951bba259bf7d831d18cdc96"),
     ])
     def test_calculate_hash(self, file_path, expected):
-        assert FileUtils.calculate_hash(file_path) == expected
\ No newline at end of file
+        assert FileUtils.calculate_hash(file_path) == expected
+
+    def test_write_atomic(self, tmp_path):
+        file_path = tmp_path / "note.md"
+        file_path.write_text("old")
+        file_path.chmod(0o644)
+        FileUtils.write_atomic(str(file_path), b"new content")
+
+        assert file_path.read_bytes() == b"new content"
+        assert file_path.stat().st_mode & 0o777 == 0o644
+        assert [p.name for p in tmp_path.iterdir()] == ["note.md"]
+        assert FileUtils.hash_bytes(b"new content") == FileUtils.calculate_hash(str(file_path))
+
+class TestProfiler:
+    @pytest.fixture(autouse=True)
+    def profiler(self):
+        Profiler.enabled = True
+        Profiler.reset()
+        yield Profiler
+        Profiler.enabled = False
+        Profiler.reset()
+
+    def test_phase(self, profiler):
+        with profiler.phase("db.load"):
+            pass
+        with profiler.phase("db.load"):
+            pass
+
+        timings = profiler.timings()
+        assert timings["db.load"]["calls"] == 2
+        assert timings["db.load"]["max"] <= timings["db.load"]["total"]
+
+    def test_timed(self, profiler):
+        @profiler.timed("note.keywords")
+        def keywords(text):
+            return text.split()
+
+        assert keywords("a b") == ["a", "b"]
+        assert profiler.timings()["note.keywords"]["calls"] == 1
+        assert "note.keywords" in profiler.summary()
+
+    def test_disabled(self, profiler):
+        profiler.enabled = False
+        with profiler.phase("qna.retrieval"):
+            pass
+        assert profiler.timings() == {}
+
+class TestLogUtils:
+    @pytest.fixture
+    def records(self):
+        logger = logging.getLogger(OPERATION_LOGGER)
+        handler = logging.handlers.BufferingHandler(100)
+        level = logger.level
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        yield handler.buffer
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+
+    def test_timed(self, records):
+        with LogUtils.timed("ads.query", service="ADS") as operation:
+            operation["bytes"] = 10
+
+        entry = json.loads(JsonFormatter().format(records[0]))
+        assert entry["operation"] == "ads.query"
+        assert entry["service"] == "ADS"
+        assert entry["bytes"] == 10
+        assert entry["outcome"] == "ok"
+        assert entry["duration_ms"] >= 0
+
+    def test_timed_error(self, records):
+        with pytest.raises(ValueError):
+            with LogUtils.timed("db.save", key="abc"):
+                raise ValueError("disk full")
+
+        entry = json.loads(JsonFormatter().format(records[0]))
+        assert entry["outcome"] == "error"
+        assert entry["error"] == "disk full"
+        assert entry["key"] == "abc"
+
+    def test_context(self, records):
+        def query():
+            with LogUtils.timed("arxiv.query"):
+                LogUtils.add_bytes(7)
+
+        with LogUtils.context(key="note1"):
+            with LogUtils.timed("crossref.doi"):
+                LogUtils.add_bytes(10)
+                LogUtils.add_bytes(5)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(LogUtils.bind(query)).result()
+        with LogUtils.timed("bm25.save"):
+            pass
+
+        entries = [json.loads(JsonFormatter().format(record)) for record in records]
+        assert [(e.get("key"), e.get("bytes")) for e in entries] == [("note1", 15), ("note1", 7), (None, None)]